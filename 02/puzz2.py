@@ -77,26 +77,32 @@ def run_intcode(inp):
 
 
 if __name__ == '__main__':
-    import itertools
+    import os
     import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from intcode.symbolic import SymbolicComputer, solve, symbol
 
     with open('02/input', 'r') as f:
-        orig_inp = f.readline()
-    orig_inp = [int(i) for i in orig_inp.split(',')]
+        program = f.readline()
+    orig_inp = [int(i) for i in program.split(',')]
     
-    for i, j in itertools.product(range(100), range(100)):
-        # replace position 1 with the value i and replace position 2 with the
-        # value j.
+    # run the program once with the noun and verb left as symbols: address 0
+    # comes out as a polynomial in them, which can be solved for the target
+    noun, verb = symbol('noun'), symbol('verb')
+    path, = SymbolicComputer(program, cells={1: noun, 2: verb}).run()
+    print(f'[0] = {path.mem[0]}')
+
+    for values in solve(path.mem[0], 19690720,
+                        {'noun': range(100), 'verb': range(100)}):
+        i, j = values['noun'], values['verb']
+        # check the solution against the one-at-a-time computer
         inp = orig_inp.copy()
         inp[1] = i
         inp[2] = j
-
-        inp = run_intcode(inp)
+        assert run_intcode(inp)[0] == 19690720
 
         print(f'({i}, {j}): {inp[0]}')
-
-        if inp[0] == 19690720:
-            print(f'{100 * i + j}')
-            sys.exit(0)
+        print(f'{100 * i + j}')
+        sys.exit(0)
     
     # Answer is 2347
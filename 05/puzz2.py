@@ -70,28 +70,10 @@ What is the diagnostic code for system ID 5?
 """
 
 
-def parse_param_modes(param_int, nparams, pos, inp):
-    params = [0] * nparams
-    if param_int:
-        param_str = f'{param_int:0{nparams}g}'
-    else:
-        param_str = '0' * nparams
-    for i, mode in enumerate(param_str[::-1]):
-        # print(i, mode)
-        param_val = inp[pos + i + 1]
-        if int(mode) == 0:
-            # position mode, so value is position in memory of parameter
-            if i < 2:
-                params[i] = inp[param_val]
-            else:
-                # unless it's the output value, then it's just the position
-                params[i] = param_val
-        elif int(mode) == 1:
-            # immediate mode, so value is just the parameter
-            params[i] = param_val
-        else:
-            raise ValueError('Parameter mode should be either 0 or 1')
-    return params
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intcode import Computer
 
 
 def run_intcode(inp, user_input=None):
@@ -102,91 +84,12 @@ def run_intcode(inp, user_input=None):
         If None, opcode 3 will ask the user for an input, otherwise user_input 
         is used
     """
-    pos = 0
-    iteration = 1
-    last_output = None
-    inp = [int(i) for i in inp.split(',')]
-    # print(f'iteration {iteration}: {inp}')
-
-    # opcode 1 means add; opcode 2 means multiply
-    # next three numbers are first input index, second input index, and index to
-    # write to
-    
-    # opcode 3 means take an input and save it to position
-    # opcode 4 means output (print) the parameter
-    while True:
-        opcode = inp[pos]
-        param_int = None
-        jumped = False
-        # print(f'iteration {iteration}')
-        # print(f'pos: {pos}; opcode: {opcode}; inp: {inp}')
-
-
-        if opcode == 99:
-            break
-
-        if opcode > 9:
-            # we have more than two digits, so split opcode and parameters
-            reduced_opcode = int(str(opcode)[-2:])
-            param_int = int(str(opcode)[:-2])
-            opcode = reduced_opcode
-
-        if opcode == 1:
-            # add values of first two parameters and store in third param
-            nparams = 3
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            inp[params[2]] = params[0] + params[1]
-        elif opcode == 2:
-            # multiply values of first two parameters and store in third param
-            nparams = 3
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            inp[params[2]] = params[0] * params[1]
-        elif opcode == 3:
-            # take input from user and store at postion of only parameter
-            nparams = 1
-            if user_input:
-                input_code = int(user_input)
-            else:
-                input_code = int(input('Enter program input: '))
-            inp[inp[pos+1]] = input_code
-        elif opcode == 4:
-            # output value of the only parameter
-            nparams = 1
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            print(f'OUTPUT: {params[0]}')
-            last_output = params[0]
-        elif opcode == 5:
-            nparams = 2
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            if params[0] != 0:
-                pos = params[1]
-                jumped = True
-        elif opcode == 6:
-            nparams = 2
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            if params[0] == 0:
-                pos = params[1]
-                jumped = True
-        elif opcode == 7:
-            nparams = 3
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            if params[0] < params[1]:
-                inp[params[2]] = 1
-            else:
-                inp[params[2]] = 0
-        elif opcode == 8:
-            nparams = 3
-            params = parse_param_modes(param_int, nparams, pos, inp)
-            if params[0] == params[1]:
-                inp[params[2]] = 1
-            else:
-                inp[params[2]] = 0
-        
-        if not jumped:
-            pos += nparams + 1
-        
-        iteration += 1
-    return last_output
+    c = Computer('TEST', inp, input_code=user_input,
+                 interactive=user_input is None)
+    c.run_intcode()
+    for output in c.total_output:
+        print(f'OUTPUT: {output}')
+    return c.last_output
 
 
 if __name__ == '__main__':
@@ -79,148 +79,18 @@ signal that can be sent to the thrusters?
 
 import itertools
 
-class Computer():
-    def __init__(self, inp, phase_setting, input_code):
-        self.mem = [int(i) for i in inp.split(',')]
-        self.input_stack = [phase_setting, input_code]
-        self.output = None
-
-
-    @staticmethod
-    def parse_param_modes(param_int, nparams, pos, inp):
-        params = [0] * nparams
-        if param_int:
-            param_str = f'{param_int:0{nparams}g}'
-        else:
-            param_str = '0' * nparams
-        for i, mode in enumerate(param_str[::-1]):
-            # print(i, mode)
-            param_val = inp[pos + i + 1]
-            if int(mode) == 0:
-                # position mode, so value is position in memory of parameter
-                if i < 2:
-                    params[i] = inp[param_val]
-                else:
-                    # unless it's the output value, then it's just the position
-                    params[i] = param_val
-            elif int(mode) == 1:
-                # immediate mode, so value is just the parameter
-                params[i] = param_val
-            else:
-                raise ValueError('Parameter mode should be either 0 or 1')
-        return params
-
-
-    def run_intcode(self):
-        """
-        inp : str
-            The comma-separated string of inputs
-        """
-        if not hasattr(self, 'pos'):
-            self.pos = 0
-        if not hasattr(self, 'iteration'):
-            self.iteration = 1
-        if not hasattr(self, 'last_output'):
-            self.last_output = None
-        # print(f'self.iteration {self.iteration}: {self.mem}')
-
-        # opcode 1 means add; opcode 2 means multiply
-        # next three numbers are first input index, second input index, and index to
-        # write to
-        
-        # opcode 3 means take an input and save it to position
-        # opcode 4 means output (print) the parameter
-        while True:
-            opcode = self.mem[self.pos]
-            param_int = None
-            jumped = False
-            # print(f'self.iteration {self.iteration}')
-            # print(f'self.pos: {self.pos}; opcode: {opcode}; inp: {self.mem}')
-
-
-            if opcode == 99:
-                break
-
-            if opcode > 9:
-                # we have more than two digits, so split opcode and parameters
-                reduced_opcode = int(str(opcode)[-2:])
-                param_int = int(str(opcode)[:-2])
-                opcode = reduced_opcode
-
-            if opcode == 1:
-                # add values of first two parameters and store in third param
-                nparams = 3
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                self.mem[params[2]] = params[0] + params[1]
-            elif opcode == 2:
-                # multiply values of first two parameters and store in third param
-                nparams = 3
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                self.mem[params[2]] = params[0] * params[1]
-            elif opcode == 3:
-                # take input from user and store at postion of only parameter
-                nparams = 1
-                if len(self.input_stack) > 0:
-                    input_code = int(self.input_stack.pop(0))
-                else:
-                    # we've run out of inputs, so we have to pause and wait
-                    # for the 
-                    input_code = int(input('Enter program input: '))
-                self.mem[self.mem[self.pos+1]] = input_code
-            elif opcode == 4:
-                # output value of the only parameter
-                nparams = 1
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                print(f'OUTPUT: {params[0]}')
-                self.last_output = params[0]
-            elif opcode == 5:
-                nparams = 2
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                if params[0] != 0:
-                    self.pos = params[1]
-                    jumped = True
-            elif opcode == 6:
-                nparams = 2
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                if params[0] == 0:
-                    self.pos = params[1]
-                    jumped = True
-            elif opcode == 7:
-                nparams = 3
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                if params[0] < params[1]:
-                    self.mem[params[2]] = 1
-                else:
-                    self.mem[params[2]] = 0
-            elif opcode == 8:
-                nparams = 3
-                params = Computer.parse_param_modes(param_int, nparams, 
-                                                    self.pos, self.mem)
-                if params[0] == params[1]:
-                    self.mem[params[2]] = 1
-                else:
-                    self.mem[params[2]] = 0
-            
-            if not jumped:
-                self.pos += nparams + 1
-            
-            self.iteration += 1
-
-        self.output = self.last_output
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intcode import Computer
 
 
 def run_sequence(inp, phase_codes):
-    A = Computer(inp, phase_codes[0], 0); A.run_intcode()
-    B = Computer(inp, phase_codes[1], A.output); B.run_intcode()
-    C = Computer(inp, phase_codes[2], B.output); C.run_intcode()
-    D = Computer(inp, phase_codes[3], C.output); D.run_intcode()
-    E = Computer(inp, phase_codes[4], D.output); E.run_intcode()
+    A = Computer('A', inp, phase_codes[0], 0); A.run_intcode()
+    B = Computer('B', inp, phase_codes[1], A.output); B.run_intcode()
+    C = Computer('C', inp, phase_codes[2], B.output); C.run_intcode()
+    D = Computer('D', inp, phase_codes[3], C.output); D.run_intcode()
+    E = Computer('E', inp, phase_codes[4], D.output); E.run_intcode()
     
     # print(E.output, type(E.output))
 
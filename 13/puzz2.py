@@ -27,227 +27,11 @@ from matplotlib import pyplot as plt
 import numpy as np
 import matplotlib.animation as animation
 
-class Computer():
-    def __init__(self, name, inp, 
-                 phase_setting=None, input_code=None, debug_level='off'):
-        self.name = name
-        self.mem = [int(i) for i in inp.split(',')] + \
-            [0]*len(inp.split(','))*100
-        self.input_stack = []
-        if phase_setting is not None:
-            self.input_stack += [phase_setting]
-        if input_code is not None:
-            self.input_stack += [input_code]
-        self.rel_base = 0
-        self.output = None
-        self.output_pos = None
-        self.cur_opcode = None
-        self.total_output = []
-        self.this_runs_output = []
-        self.debug_level = debug_level
-
-
-    def parse_param_modes(self, param_int, nparams):
-        params = [0] * nparams
-        if param_int:
-            param_str = f'{param_int:0{nparams}g}'
-        else:
-            param_str = '0' * nparams
-        for i, mode in enumerate(param_str[::-1]):
-            param_val = self.mem[self.pos + i + 1]
-            if int(mode) == 0:
-                # position mode, so value is position in memory of parameter
-                if i < 2 and self.cur_opcode != 3:
-                    params[i] = self.mem[param_val]
-                else:
-                    # unless it's the output value, then it's just the position
-                    params[i] = param_val
-            elif int(mode) == 1:
-                # immediate mode, so value is just the parameter
-                params[i] = param_val
-            elif int(mode) == 2:
-                # relative mode (similar to position, but with rel_base added)
-                # for opcode 3, since we're writing, we want to be in immediate 
-                # mode:
-                if i < 2:
-                    params[i] = self.mem[param_val + self.rel_base]
-                else:
-                    # unless it's the output value, then it's just the position 
-                    # (this is immediate mode)
-                    params[i] = param_val + self.rel_base
-            else:
-                raise ValueError('Parameter mode should be either 0 or 1')
-        for p in params: self.dbg_print(str(p), space=' ')
-        self.dbg_print('\t' * (1 if nparams==1 else 0) + '| ')
-        return params
-
-    
-    def print_mem_array(self):
-        print('indx: ', end='')
-        for num in range(len(self.mem)):
-            print(f'{num:4g} ', end='')
-        print('')
-        print('vals: ', end='')
-        for num in self.mem[:100]:
-            print(f'{num:4g} ', end='')
-        print('')
-
-    
-    def dbg_print(self, string, space='\t', newline=False):
-        if self.debug_level == 'all':
-            print(space + string,
-                  end='' if not newline else '\n')
-        if self.debug_level == 'output':
-            if self.cur_opcode in [3, 4]:
-                print(space + string,
-                    end='' if not newline else '\n')
-
-
-    def run_intcode(self, new_input=None):
-        """
-        inp : str
-            The comma-separated string of inputs
-        """
-        if not hasattr(self, 'pos'):
-            self.pos = 0
-        if not hasattr(self, 'iteration'):
-            self.iteration = 1
-        if not hasattr(self, 'last_output'):
-            self.last_output = None
-        self.this_runs_output = []
-        
-        # opcode 1 means add; opcode 2 means multiply
-        # next three numbers are first input index, second input index, and index to
-        # write to
-        
-        # opcode 3 means take an input and save it to position
-        # opcode 4 means output (print) the parameter
-        while True:
-            opcode = self.mem[self.pos]
-            param_int = None
-            params = None
-            jumped = False
-            self.dbg_print(f'({self.pos:04g})', space='\n')
-            self.dbg_print(f'{opcode}')
-
-            if opcode == 99:
-                print('REACHED OPCODE 99 -- BREAKING')
-                return False
-
-            if opcode > 9:
-                # we have more than two digits, so split opcode and parameters
-                reduced_opcode = int(str(opcode)[-2:])
-                param_int = int(str(opcode)[:-2])
-                opcode = reduced_opcode
-
-            self.cur_opcode = opcode
-
-            if opcode == 1:
-                # add values of first two parameters and store in third param
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'ADD ({nparams})')
-                self.mem[params[2]] = params[0] + params[1]
-                self.dbg_print(f'\t\t| {params[0]} + {params[1]} -> mem[{params[2]}]')
-            elif opcode == 2:
-                # multiply values of first two parameters and store in third param
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'MULT ({nparams})')
-                self.mem[params[2]] = params[0] * params[1]
-                self.dbg_print(f'\t| {params[0]} * {params[1]} -> mem[{params[2]}]')
-            elif opcode == 3:
-                # take input from user and store at postion of only parameter
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'INPUT ({nparams})')
-                if len(self.input_stack) > 0:
-                    input_code = int(self.input_stack.pop(0))
-                    self.dbg_print(f'\t| got {input_code} from input_stack')
-                else:
-                    if new_input is not None:
-                        input_code = int(new_input)
-                        self.dbg_print(f'\t| got {input_code} from new_input')
-                        # make sure to clear new_input, so we don't think we
-                        # got another input the next time we see an opcode 3                        
-                        new_input = None
-                    # we've run out of inputs, so we have to pause and wait
-                    # for the program to continue with a new input
-                    # Return None to indicate that we're not done yet
-                    else:
-                        self.output = self.last_output
-                        self.dbg_print('\t| no new input; pausing', 
-                                       newline=True)
-                        return None
-                self.mem[params[0]] = input_code
-                self.dbg_print(f'| {input_code} -> mem[{params[0]}]')
-            elif opcode == 4:
-                # output value of the only parameter
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'OUTPUT ({nparams})')
-                self.last_output = params[0]
-                self.output_pos = self.pos
-                self.output = self.last_output
-                self.total_output += [self.last_output]
-                self.this_runs_output += [self.last_output]
-                self.dbg_print(f'\t* **OUTPUT** {self.output}')
-            elif opcode == 5:
-                nparams = 2
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'JMP_IF_NONZERO ({nparams})')
-                if params[0] != 0:
-                    self.pos = params[1]
-                    jumped = True
-                    self.dbg_print(f'| {params[0]} != 0, so jumped | {params[1]} -> pos')
-                else:
-                    self.dbg_print(f'| {params[0]} == 0, so did not jump')
-            elif opcode == 6:
-                nparams = 2
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'JMP_IF_ZERO ({nparams})')
-                if params[0] == 0:
-                    self.pos = params[1]
-                    jumped = True
-                    self.dbg_print(f'\t| {params[0]} == 0, so jumped | {params[1]} -> pos')
-                else:
-                    self.dbg_print(f'\t| {params[0]} != 0, so did not jump')
-
-            elif opcode == 7:
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'LESS_THAN ({nparams})')
-                if params[0] < params[1]:
-                    self.mem[params[2]] = 1
-                    self.dbg_print(f'\t| {params[0]} < {params[1]}, so 1 -> {params[2]}')
-                else:
-                    self.mem[params[2]] = 0
-                    self.dbg_print(f'\t| {params[0]} !< {params[1]}, so 0 -> {params[2]}')
-            elif opcode == 8:
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'EQUALS ({nparams})')
-                if params[0] == params[1]:
-                    self.mem[params[2]] = 1
-                    self.dbg_print(f'\t| was_equal | 1 -> mem[{params[2]}]')
-                else:
-                    self.mem[params[2]] = 0
-                    self.dbg_print(f'\t| not_equal | 0 -> mem[{params[2]}]')
-            elif opcode == 9:
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print('ADJ_RELBASE')
-                self.dbg_print(f'\t| {self.rel_base} += {params[0]}')
-                self.rel_base += params[0]
-                self.dbg_print(f' = {self.rel_base}', space='')
-                
-            
-            if not jumped:
-                self.pos += nparams + 1
-            
-            self.iteration += 1
-
-        self.output = self.last_output
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intcode.devices import Device, DeviceComputer
+from intcode.framing import Frames
 
 def chunks(l, n):
     """Break a list l into chunks of size l"""
@@ -292,27 +76,39 @@ def render_board(board, fig=None, im=None, ims=None):
 
     return fig, im, ims
 
-if __name__ == '__main__':
-
-    with open('13/input', 'r') as f:
-        inp = f.readline()
-
-    c = Computer('game', inp, debug_level='off')
-    c.mem[0] = 2
-    ims = []
-    fig, im = None, None
-    c.run_intcode()
-    iters = 1
-
-    tiles = list(chunks(c.total_output, 3))
-    board = tiles_to_board(tiles)
-    ball_x = [t for t in tiles if t[2] == 4][0][0]
-    paddle_x = [t for t in tiles if t[2] == 3][0][0]
-    score = [t for t in tiles if t[0] == -1 and t[1] == 0][-1][0]
-    
-    fig, im, ims = render_board(board, fig, im, ims)
-
-    while True:
+class Arcade(Device):
+    """
+    The cabinet, as the program's device: outputs are drawn on ``board`` (or
+    shown as the score) three at a time, as the computer frames them in
+    ``frames``, and each input is the joystick following the ball, after
+    the board drawn so far is rendered.
+    """
+    def __init__(self, frames):
+        self.board = None
+        self.tiles = []
+        self.frames = frames
+        self.score = 0
+        self.iters = 0
+        self.fig, self.im, self.ims = None, None, []
+
+    def write(self, value):
+        # the computer has already added the value to its frames
+        for x, y, val in self.frames.take():
+            if x == -1 and y == 0:
+                self.score = val
+            if self.board is None:
+                # the first screen is drawn before the game asks for input
+                self.tiles.append((x, y, val))
+            else:
+                self.board[y, x] = val
+
+    def read(self):
+        if self.board is None:
+            self.board = tiles_to_board(self.tiles)
+        self.fig, self.im, self.ims = render_board(self.board, self.fig,
+                                                  self.im, self.ims)
+        ball_x = np.argwhere(self.board == 4)[0][1]
+        paddle_x = np.argwhere(self.board == 3)[0][1]
         if paddle_x < ball_x:
             # paddle is left of ball, so move right
             new_inp = 1
@@ -322,23 +118,34 @@ if __name__ == '__main__':
         else:
             # paddle is at ball position, so do not move
             new_inp = 0
+        self.iters += 1
+        if self.iters % 100 == 0:
+            print(f'{self.iters:05g} - Ball: {ball_x} - Paddle: {paddle_x} - '
+                  f'Providing input {new_inp} - Score: {self.score}')
+        return new_inp
 
-        if c.cur_opcode == 3:
-            c.run_intcode(new_input=new_inp)
-            tiles = list(chunks(c.this_runs_output, 3))
-            for t in tiles:
-                x, y, val = t
-                board[y, x] = val
-            if iters % 100 == 0:
-                print(f'{iters:05g} - Ball: {ball_x} - Paddle: {paddle_x} - Providing input {new_inp} - Score: {score}')
-            fig, im, ims = render_board(board, fig, im, ims)
-            
-            ball_x = np.argwhere(board == 4)[0][1]
-            paddle_x = np.argwhere(board == 3)[0][1]
-            iters += 1
-        else:
-            print("Breaking while loop")
-            break
+
+if __name__ == '__main__':
+
+    with open('13/input', 'r') as f:
+        inp = f.readline()
+
+    # with --record, the game is recorded, so that c.recorder.seek(n) gives
+    # back the game as it was n instructions in
+    record = 10000 if '--record' in sys.argv else None
+    # the computer frames the tiles for the arcade, rather than keeping
+    # every output of the game in total_output
+    frames = Frames(3)
+    arcade = Arcade(frames)
+    c = DeviceComputer('game', inp, arcade, debug_level='off', record=record,
+                       frames=frames)
+    c.mem[0] = 2
+    # the whole game is one call: the arcade moves the joystick when asked
+    c.run()
+    board = arcade.board
+    fig, im, ims = render_board(board, arcade.fig, arcade.im, arcade.ims)
+
+    print("Breaking while loop")
 
     print(f'Final score is {board[0, -1]}')
     
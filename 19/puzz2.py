@@ -67,258 +67,21 @@ from tqdm import tqdm
 import multiprocessing as mp
 import pickle
 
-class Computer():
-    def __init__(self, name, inp, 
-                 phase_setting=None, input_code=None, 
-                 interactive=False, debug_level='off'):
-        self.name = name
-        self.mem = [int(i) for i in inp.split(',')] + \
-            [0]*len(inp.split(','))*100
-        self.input_stack = []
-        if phase_setting is not None:
-            self.input_stack += [phase_setting]
-        if input_code is not None:
-            self.input_stack += [input_code]
-        self.rel_base = 0
-        self.output = None
-        self.output_pos = None
-        self.cur_opcode = None
-        self.interactive = interactive
-        self.total_output = []
-        self.this_runs_output = []
-        self.debug_level = debug_level
-
-
-    def parse_param_modes(self, param_int, nparams):
-        params = [0] * nparams
-        if self.pos == 995:
-            print('', end='')
-        if param_int:
-            param_str = f'{param_int:0{nparams}g}'
-        else:
-            param_str = '0' * nparams
-        for i, mode in enumerate(param_str[::-1]):
-            param_val = self.mem[self.pos + i + 1]
-            if int(mode) == 0:
-                # position mode, so value is position in memory of parameter
-                if i < 2 and self.cur_opcode != 3:
-                    params[i] = self.mem[param_val]
-                else:
-                    # unless it's the output value, then it's just the position
-                    params[i] = param_val
-            elif int(mode) == 1:
-                # immediate mode, so value is just the parameter
-                params[i] = param_val
-            elif int(mode) == 2:
-                # relative mode (similar to position, but with rel_base added)
-                # i is parameter number (0, 1, or 3); if i==2, we're writing   
-                if i < 2 and self.cur_opcode != 3:
-                    params[i] = self.mem[param_val + self.rel_base]
-                else:
-                    # unless it's the output value, then it's just the position 
-                    # (this is immediate mode)
-                    params[i] = param_val + self.rel_base
-            else:
-                raise ValueError('Parameter mode should be either 0 or 1')
-        for p in params: self.dbg_print(str(p), space=' ')
-        self.dbg_print('\t' * (1 if nparams==1 else 0) + '| ')
-        return params
-
-    
-    def print_mem_array(self):
-        print('indx: ', end='')
-        for num in range(len(self.mem)):
-            print(f'{num:4g} ', end='')
-        print('')
-        print('vals: ', end='')
-        for num in self.mem[:100]:
-            print(f'{num:4g} ', end='')
-        print('')
-
-    
-    def dbg_print(self, string, space='\t', newline=False):
-        if self.debug_level == 'all':
-            print(space + string,
-                  end='' if not newline else '\n')
-        if self.debug_level == 'output':
-            if self.cur_opcode in [3, 4]:
-                print(space + string,
-                    end='' if not newline else '\n')
-
-
-    def run_intcode(self, new_input=None):
-        """
-        inp : str
-            The comma-separated string of inputs
-        """
-        if not hasattr(self, 'pos'):
-            self.pos = 0
-        if not hasattr(self, 'iteration'):
-            self.iteration = 1
-        if not hasattr(self, 'last_output'):
-            self.last_output = None
-        self.this_runs_output = []
-        
-        # opcode 1 means add; opcode 2 means multiply
-        # next three numbers are first input index, second input index, and index to
-        # write to
-        
-        # opcode 3 means take an input and save it to position
-        # opcode 4 means output (print) the parameter
-        while True:
-            opcode = self.mem[self.pos]
-            param_int = None
-            params = None
-            jumped = False
-            if self.pos == 989:
-                print('', end='')
-
-            if opcode == 99:
-                # print('REACHED OPCODE 99 -- BREAKING')
-                return False
-
-            if opcode > 9:
-                # we have more than two digits, so split opcode and parameters
-                reduced_opcode = int(str(opcode)[-2:])
-                param_int = int(str(opcode)[:-2])
-                opcode = reduced_opcode
-
-            self.cur_opcode = opcode
-
-            self.dbg_print(f'({self.pos:04g})', space='\n')
-            self.dbg_print(f'{opcode}')
-
-            if opcode == 1:
-                # add values of first two parameters and store in third param
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'ADD ({nparams})')
-                self.mem[params[2]] = params[0] + params[1]
-                self.dbg_print(f'\t\t| {params[0]} + {params[1]} -> mem[{params[2]}]')
-            elif opcode == 2:
-                # multiply values of first two parameters and store in third param
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'MULT ({nparams})')
-                self.mem[params[2]] = params[0] * params[1]
-                self.dbg_print(f'\t| {params[0]} * {params[1]} -> mem[{params[2]}]')
-            elif opcode == 3:
-                # take input from user and store at postion of only parameter
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'INPUT ({nparams})')
-                if len(self.input_stack) > 0:
-                    input_code = int(self.input_stack.pop(0))
-                    self.dbg_print(f'\t| got {input_code} from input_stack')
-                else:
-                    if self.interactive and new_input is None:
-                        in_string = input('Enter input for intcode computer: ')
-                        try: 
-                            input_code = int(in_string)
-                        except ValueError:
-                            self.output = self.last_output
-                            self.dbg_print('\t| no new input; pausing', 
-                                        newline=True)
-                            return None
-                        self.dbg_print(f'\t| got {input_code} from interactive input')
-                    else:
-                        if new_input is not None:
-                            input_code = int(new_input)
-                            self.dbg_print(f'\t| got {input_code} from new_input')
-                            # make sure to clear new_input, so we don't think we
-                            # got another input the next time we see an opcode 3                        
-                            new_input = None
-                        # we've run out of inputs, so we have to pause and wait
-                        # for the program to continue with a new input
-                        # Return None to indicate that we're not done yet
-                        else:
-                            self.output = self.last_output
-                            self.dbg_print('\t| no new input; pausing', 
-                                        newline=True)
-                            return None
-                self.mem[params[0]] = input_code
-                self.dbg_print(f'| {input_code} -> mem[{params[0]}]')
-            elif opcode == 4:
-                # output value of the only parameter
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'OUTPUT ({nparams})')
-                self.last_output = params[0]
-                self.output_pos = self.pos
-                self.output = self.last_output
-                self.total_output += [self.last_output]
-                self.this_runs_output += [self.last_output]
-                self.dbg_print(f'\t* **OUTPUT** {self.output}')
-            elif opcode == 5:
-                nparams = 2
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'JMP_IF_NONZERO ({nparams})', space='\t\t')
-                if params[0] != 0:
-                    self.pos = params[1]
-                    jumped = True
-                    self.dbg_print(f'| {params[0]} != 0, so jumped | {params[1]} -> pos')
-                else:
-                    self.dbg_print(f'| {params[0]} == 0, so did not jump')
-            elif opcode == 6:
-                nparams = 2
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'JMP_IF_ZERO ({nparams})', space='\t\t')
-                if params[0] == 0:
-                    self.pos = params[1]
-                    jumped = True
-                    self.dbg_print(f'\t| {params[0]} == 0, so jumped | {params[1]} -> pos')
-                else:
-                    self.dbg_print(f'\t| {params[0]} != 0, so did not jump')
-
-            elif opcode == 7:
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print(f'LESS_THAN ({nparams})')
-                if params[0] < params[1]:
-                    self.mem[params[2]] = 1
-                    self.dbg_print(f'\t| {params[0]} < {params[1]}, so 1 -> {params[2]}')
-                else:
-                    self.mem[params[2]] = 0
-                    self.dbg_print(f'\t| {params[0]} !< {params[1]}, so 0 -> {params[2]}')
-            elif opcode == 8:
-                nparams = 3
-                params = self.parse_param_modes(param_int, nparams)
-                if self.pos == 995:
-                    print('', end='')
-                    pass
-                self.dbg_print(f'EQUALS ({nparams})')
-                if params[0] == params[1]:
-                    self.mem[params[2]] = 1
-                    self.dbg_print(f'\t| was_equal | 1 -> mem[{params[2]}]')
-                else:
-                    self.mem[params[2]] = 0
-                    self.dbg_print(f'\t| not_equal | 0 -> mem[{params[2]}]')
-            elif opcode == 9:
-                nparams = 1
-                params = self.parse_param_modes(param_int, nparams)
-                self.dbg_print('ADJ_RELBASE')
-                self.dbg_print(f'\t| {self.rel_base} += {params[0]}')
-                self.rel_base += params[0]
-                self.dbg_print(f' = {self.rel_base}', space='')
-                
-            
-            if not jumped:
-                self.pos += nparams + 1
-            
-            self.iteration += 1
-
-        self.output = self.last_output
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intcode import Computer
+from intcode.pool import ComputerPool
+from intcode.batch import run_batch
+from intcode.loader import load_program
+from intcode.sweep import sweep
         
 
 def run_part1(inp):
-    arr = np.zeros((50,50))
-    
-    for y,x in tqdm(np.ndindex(arr.shape), total=50**2):
-        c = Computer('tractorbeam', inp, debug_level='off')    
-        c.run_intcode(x)
-        c.run_intcode(y)
-        arr[y,x] = c.last_output
-        # print(x, y, c.last_output)
+    # every (x, y) of the grid runs at once, as one lane of a batch
+    y, x = np.indices((50,50))
+    arr = run_batch(inp, np.column_stack([x.ravel(), y.ravel()]))
+    arr = arr.reshape(50,50).astype(float)
 
     output_str = ''
     for y in range(arr.shape[0]):
@@ -337,30 +100,47 @@ def run_part2_one_value(inp, xy, size=None):
         itr = x*size + y
         perc = itr/(size**2) * 100
     
-    c = Computer('tractorbeam', inp, debug_level='off')    
-    c.run_intcode(x)
-    c.run_intcode(y)
-    # print(f'{perc:.2f}%:', x, y, c.last_output)
-    return (x, y, c.last_output)
+    # each worker process keeps its own pool of computers between calls
+    output = ComputerPool.for_program(inp).query([x, y])[-1]
+    # print(f'{perc:.2f}%:', x, y, output)
+    return (x, y, output)
+
+
+def add_point(results, xy, output):
+    results.append((*xy, output[-1]))
+    return results
 
 
 def run_part2_1000():
-    with open('19/input', 'r') as f:
-        inp = f.readline()
+    inp = load_program('19/input')
     
     size = 1000
 
     print(f'Using {mp.cpu_count()} threads')
-    pool = mp.Pool(mp.cpu_count())
-    
-    results = [pool.apply(run_part2_one_value, args=(inp, xy, size)) 
-               for xy in np.ndindex((size,size))]
-    
-    pool.close()
+    results = sweep(inp, np.ndindex((size,size)), reducer=add_point,
+                    report=True)
+    results.sort()
     
     with open('19/puzz2_1.pk', 'wb') as f:
         pickle.dump(results, f)
 
+def run_part2_batch(size, chunk=10000):
+    """
+    Same grid as run_part2_serial, but every point is probed, ``chunk`` at a
+    time, by the batched computer.
+    """
+    with open('19/input', 'r') as f:
+        inp = f.readline()
+
+    y, x = np.indices((size, size))
+    xy = np.column_stack([x.ravel(), y.ravel()])
+    arr = np.zeros(size**2, dtype=int)
+    for start in tqdm(range(0, size**2, chunk)):
+        arr[start:start + chunk] = run_batch(inp, xy[start:start + chunk],
+                                             chunk=chunk)
+    return arr.reshape(size, size)
+
+
 def run_part2_serial(size):
     with open('19/input', 'r') as f:
         inp = f.readline()
@@ -0,0 +1,9 @@
+"""
+Intcode computer shared by the 2019 puzzles (days 5, 7, 9, 11, 13, 15, 17, 19,
+21, 23 and 25).
+
+The day scripts are run from the repository root (``python 09/puzz2.py``), so
+they put the root on ``sys.path`` before importing this package.
+"""
+from .computer import Computer, Stop, decode, disassemble
+from .pool import ComputerPool
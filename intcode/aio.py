@@ -0,0 +1,87 @@
+"""
+Intcode computers that take their inputs from, and send their outputs to,
+``asyncio`` queues.
+
+An ``AsyncComputer`` reads from its ``inbox`` queue once ``input_stack`` is
+used up, and puts every output on its ``outbox`` queue.  Inputs already
+waiting in the queue are taken as the program reaches them, without leaving
+the run loop; when the queue is empty, ``run_intcode`` returns as it does
+for any computer out of input.  So machines can be wired together by sharing
+queues (``chain`` makes pipelines and rings) and all run at once with
+``run_all``, which runs them in turn directly while any of them has input to
+work on, and only gives way to the event loop when all of them are waiting
+for input from elsewhere.
+
+Outputs are put without waiting, so an ``outbox`` should not have a maximum
+size.
+"""
+import asyncio
+
+from .computer import Computer
+
+
+class AsyncComputer(Computer):
+    """
+    A ``Computer`` with an ``inbox`` and, optionally, an ``outbox`` queue;
+    a new, empty ``inbox`` is made if none is given.  Other arguments are as
+    for ``Computer``.
+    """
+    def __init__(self, name, inp, inbox=None, outbox=None, **kwargs):
+        super().__init__(name, inp, **kwargs)
+        self.inbox = asyncio.Queue() if inbox is None else inbox
+        self.outbox = outbox
+
+    def _read_input(self):
+        value = super()._read_input()
+        if value is None and not self.inbox.empty():
+            value = int(self.inbox.get_nowait())
+        return value
+
+    def _write_output(self, value, pc):
+        super()._write_output(value, pc)
+        if self.outbox is not None:
+            self.outbox.put_nowait(value)
+
+
+def chain(computers, loop=False):
+    """
+    Send each computer's outputs to the next one's inbox, and the last one's
+    to the first one's if ``loop`` is set.  Returns ``computers``.
+    """
+    computers = list(computers)
+    following = computers[1:] + (computers[:1] if loop else [])
+    for computer, other in zip(computers, following):
+        computer.outbox = other.inbox
+    return computers
+
+
+async def run_all(computers):
+    """
+    Run every computer until they have all halted.
+
+    Computers are run in turn, directly, for as long as any of them gets
+    anywhere, each taking the inputs waiting in its inbox as it goes, so
+    handing a value from one computer to another costs no trip through the
+    event loop.  Only once every computer that hasn't halted is waiting on
+    an empty inbox does this wait, for an input from outside them.
+    """
+    running = list(computers)
+    while running:
+        moved = False
+        for computer in list(running):
+            before = computer.iteration
+            if computer.run_intcode() is False:
+                running.remove(computer)
+                moved = True
+            elif computer.iteration != before:
+                moved = True
+        if moved or not running:
+            continue
+        getters = {asyncio.ensure_future(computer.inbox.get()): computer
+                   for computer in running}
+        done, pending = await asyncio.wait(
+            getters, return_when=asyncio.FIRST_COMPLETED)
+        for getter in pending:
+            getter.cancel()
+        for getter in done:
+            getters[getter].input_stack.append(getter.result())
@@ -0,0 +1,89 @@
+"""
+Intcode computers that talk in ASCII text.
+
+Days 17, 21, 23 and 25 take their inputs as lines of text, one character
+code per input, and print their output the same way.  An ``AsciiComputer``
+takes a whole command at a time: ``send`` queues every character of it and
+runs once, instead of running once per character.  Its output is decoded as
+it comes, a character at a time, into ``lines`` (and the line still being
+printed), so what the program printed since the last command (``reply``) is
+there without decoding the whole session's output again; outputs that
+aren't characters (e.g. day 17's dust or day 21's hull damage) are kept in
+``values``.
+
+``reply`` is the text since the last ``send``, and ``prompted`` tells
+whether it ended on the program's ``prompt`` line (day 25's ``Command?``).
+"""
+from .computer import Computer
+
+# outputs past this aren't ASCII characters
+MAX_CHAR = 127
+
+
+class AsciiComputer(Computer):
+    """
+    A ``Computer`` whose input and output are ASCII text, printing
+    ``prompt`` when it wants a command.  Other arguments are as for
+    ``Computer``.
+    """
+    def __init__(self, name, inp, prompt='Command?', **kwargs):
+        self.prompt = prompt
+        super().__init__(name, inp, **kwargs)
+
+    def reset(self):
+        super().reset()
+        self.lines = []
+        self.values = []
+        self._line = []
+        # index in lines of the first line printed since the last send
+        self._reply_start = 0
+
+    def fork(self, name=None):
+        other = super().fork(name)
+        other.lines = list(self.lines)
+        other.values = list(self.values)
+        other._line = list(self._line)
+        return other
+
+    def _write_output(self, value, pc):
+        super()._write_output(value, pc)
+        if value == 10:
+            self.lines.append(''.join(self._line))
+            self._line = []
+        elif 0 <= value <= MAX_CHAR:
+            self._line.append(chr(value))
+        else:
+            self.values.append(value)
+
+    def send(self, command=''):
+        """
+        Queue ``command`` (a newline is added if it doesn't end with one) and
+        run until the program halts or wants another.  Returns the ``reply``.
+        """
+        if command and not command.endswith('\n'):
+            command += '\n'
+        self.input_stack += [ord(i) for i in command]
+        self._reply_start = len(self.lines)
+        self.run_intcode()
+        return self.reply
+
+    @property
+    def reply_lines(self):
+        """The lines printed since the last ``send``."""
+        lines = self.lines[self._reply_start:]
+        if self._line:
+            lines.append(''.join(self._line))
+        return lines
+
+    @property
+    def reply(self):
+        """The text printed since the last ``send``."""
+        text = ''.join(line + '\n' for line in self.lines[self._reply_start:])
+        return text + ''.join(self._line)
+
+    @property
+    def prompted(self):
+        """Whether the program has printed its prompt and is waiting."""
+        return (self.cur_opcode == 3
+                and len(self.lines) > self._reply_start
+                and self.lines[-1] == self.prompt and not self._line)
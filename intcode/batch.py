@@ -0,0 +1,263 @@
+"""
+Lockstep batched Intcode: many copies of one program run at once over NumPy.
+
+Days 19 and 2 run the same short program for a whole grid of inputs, one
+computer at a time.  A ``BatchComputer`` holds ``n`` copies ("lanes") of the
+program as rows of a 2-D ``int64`` array, with a program counter and relative
+base per lane, and executes them together: each step, the running lanes are
+grouped by the instruction they're at, and each group is carried out with a
+handful of array operations.  Lanes at the same position run the same
+instruction unless their code has been modified, and grouping on the
+instruction itself keeps lanes that branched apart running in the same group
+whenever they land on the same kind of instruction.
+
+Values are kept in ``int64`` arrays, and additions and multiplications are
+checked for overflow.  The first one that overflows promotes the whole batch
+to arrays of Python ints (``dtype=object``), and it carries on exactly, only
+more slowly, so programs that need bigger numbers still get the right
+answers.
+"""
+import numpy as np
+
+from .computer import NPARAMS
+from .memory import MAX_ADDRESS, load_image
+
+
+INT64_MIN = np.iinfo(np.int64).min
+
+
+def program_array(inp):
+    """
+    Return the program ``inp`` as a 1-D, read-only ``int64`` array over the
+    image's buffer (or an array of Python ints, if it doesn't fit in one).
+    """
+    image = load_image(inp)
+    if image.buffer is None:
+        return np.array([image[i] for i in range(image.size)], dtype=object)
+    return np.frombuffer(image.buffer, dtype=np.int64)[:image.size]
+
+
+def add_overflows(a, b, result):
+    """Which of the int64 sums ``result`` = ``a`` + ``b`` wrapped around."""
+    return ((a ^ result) & (b ^ result)) < 0
+
+
+def mul_overflows(a, b, result):
+    """Which of the int64 products ``result`` = ``a`` * ``b`` wrapped around."""
+    nonzero = a != 0
+    quotient = result // np.where(nonzero, a, 1)
+    return nonzero & ((quotient != b) | ((a == -1) & (b == INT64_MIN)))
+
+
+class BatchComputer():
+    """
+    ``n`` Intcode computers running the same program in lockstep.
+
+    ``mem`` is an ``(n, addresses)`` array that grows as the lanes touch
+    higher addresses; it can be edited before running, e.g.
+    ``b.mem[:, 1] = nouns``.  ``run`` takes an ``(n, k)`` array of inputs (one
+    row per lane) and runs until every lane has halted or needs an input it
+    doesn't have; calling it again with more inputs resumes the waiting
+    lanes.  Outputs collect in ``out``, with ``n_out`` of them per lane.
+    """
+    def __init__(self, inp, n):
+        self.n = n
+        self.mem = np.tile(program_array(inp), (n, 1))
+        self.pc = np.zeros(n, dtype=np.int64)
+        self.rel_base = np.zeros(n, dtype=np.int64)
+        self.halted = np.zeros(n, dtype=bool)
+        self.waiting = np.zeros(n, dtype=bool)
+        # instructions executed by each lane
+        self.iteration = np.zeros(n, dtype=np.int64)
+        self.inputs = np.zeros((n, 0), dtype=np.int64)
+        self.n_in = np.zeros(n, dtype=np.int64)
+        self.out = np.zeros((n, 4), dtype=np.int64)
+        self.n_out = np.zeros(n, dtype=np.int64)
+        self.steps = 0
+
+    @property
+    def wide(self):
+        """Whether the batch has been promoted to Python ints."""
+        return self.mem.dtype == object
+
+    def promote(self):
+        """Switch memory, inputs and outputs to Python ints."""
+        if not self.wide:
+            self.mem = self.mem.astype(object)
+            self.inputs = self.inputs.astype(object)
+            self.out = self.out.astype(object)
+
+    @property
+    def last_output(self):
+        """The last value each lane output (0 for lanes with none)."""
+        lanes = np.arange(self.n)
+        last = self.out[lanes, np.maximum(self.n_out - 1, 0)]
+        return np.where(self.n_out > 0, last, 0)
+
+    def outputs(self, lane):
+        """Return the values output by one lane, as a list."""
+        return self.out[lane, :self.n_out[lane]].tolist()
+
+    def feed(self, inputs):
+        """Queue more inputs: one value per lane, or an ``(n, k)`` array."""
+        inputs = np.asarray(inputs).reshape(self.n, -1)
+        if inputs.dtype == object:
+            self.promote()
+        else:
+            inputs = inputs.astype(np.int64)
+        self.inputs = np.concatenate([self.inputs, inputs], axis=1)
+        self.waiting[:] = False
+
+    def _grow(self, addr):
+        """Make sure ``mem`` has a column for every address in ``addr``."""
+        if addr.size == 0:
+            return
+        top = int(addr.max())
+        if top >= self.mem.shape[1]:
+            if top >= MAX_ADDRESS:
+                raise IndexError(f'Intcode address {top} is out of range')
+            width = max(top + 1, 2 * self.mem.shape[1])
+            grown = np.zeros((self.n, width), dtype=self.mem.dtype)
+            grown[:, :self.mem.shape[1]] = self.mem
+            self.mem = grown
+        if addr.min() < 0:
+            raise IndexError(f'Intcode address {int(addr.min())} '
+                             'is out of range')
+
+    def _load(self, lanes, addr):
+        self._grow(addr)
+        return self.mem[lanes, addr]
+
+    def _address(self, lanes, pc, i, mode):
+        """The address parameter ``i`` of the instruction at ``pc`` names."""
+        p = self._load(lanes, pc + i + 1)
+        if self.wide:
+            # (an address past int64 is out of range anyway)
+            p = p.astype(np.int64)
+        if mode == 2:
+            return p + self.rel_base[lanes]
+        return p
+
+    def _operand(self, lanes, pc, i, mode):
+        if mode == 1:
+            return self._load(lanes, pc + i + 1)
+        return self._load(lanes, self._address(lanes, pc, i, mode))
+
+    def _store(self, lanes, addr, values):
+        self._grow(addr)
+        self.mem[lanes, addr] = values
+
+    def _output(self, lanes, values):
+        if self.n_out[lanes].max() >= self.out.shape[1]:
+            self.out = np.concatenate([self.out, np.zeros_like(self.out)],
+                                      axis=1)
+        self.out[lanes, self.n_out[lanes]] = values
+        self.n_out[lanes] += 1
+
+    def _execute(self, value, lanes):
+        """Carry out instruction ``value`` for every lane in ``lanes``."""
+        opcode = value % 100
+        if opcode not in NPARAMS:
+            raise ValueError(f'Unknown opcode {value} in lanes {lanes[:5]}')
+        nparams = NPARAMS[opcode]
+        modes = (value // 100 % 10, value // 1000 % 10, value // 10000 % 10)
+        if any(m > 2 for m in modes[:nparams]):
+            raise ValueError('Parameter mode should be either 0, 1, or 2 '
+                             f'(got {value} in lanes {lanes[:5]})')
+        pc = self.pc[lanes]
+        nxt = pc + nparams + 1
+
+        def operand(i):
+            return self._operand(lanes, pc, i, modes[i])
+
+        if opcode in (1, 2, 7, 8):
+            a, b = operand(0), operand(1)
+            if opcode in (1, 2) and not self.wide:
+                overflows = add_overflows if opcode == 1 else mul_overflows
+                with np.errstate(over='ignore'):
+                    result = a + b if opcode == 1 else a * b
+                    wrapped = overflows(a, b, result).any()
+                if wrapped:
+                    self.promote()
+                    a, b = a.astype(object), b.astype(object)
+            if opcode == 1:
+                result = a + b
+            elif opcode == 2:
+                result = a * b
+            elif opcode == 7:
+                result = (a < b).astype(np.int64)
+            else:
+                result = (a == b).astype(np.int64)
+            self._store(lanes, self._address(lanes, pc, 2, modes[2]), result)
+        elif opcode == 3:
+            has_input = self.n_in[lanes] < self.inputs.shape[1]
+            self.waiting[lanes[~has_input]] = True
+            lanes, pc, nxt = lanes[has_input], pc[has_input], nxt[has_input]
+            if lanes.size:
+                value = self.inputs[lanes, self.n_in[lanes]]
+                self.n_in[lanes] += 1
+                self._store(lanes, self._address(lanes, pc, 0, modes[0]),
+                            value)
+        elif opcode == 4:
+            self._output(lanes, operand(0))
+        elif opcode in (5, 6):
+            test, target = operand(0), operand(1)
+            jump = test != 0 if opcode == 5 else test == 0
+            nxt = np.where(jump, target, nxt)
+        elif opcode == 9:
+            self.rel_base[lanes] += operand(0)
+        else:
+            self.halted[lanes] = True
+            return
+        self.pc[lanes] = nxt
+        self.iteration[lanes] += 1
+
+    def step(self):
+        """
+        Execute one instruction in every running lane.  Returns ``False`` once
+        no lane is left running.
+        """
+        live = np.flatnonzero(~(self.halted | self.waiting))
+        if live.size == 0:
+            return False
+        values = self._load(live, self.pc[live])
+        if (values == values[0]).all():
+            self._execute(int(values[0]), live)
+        else:
+            order = np.argsort(values, kind='stable')
+            values, live = values[order], live[order]
+            starts = np.flatnonzero(np.diff(values)) + 1
+            for group, value in zip(np.split(live, starts),
+                                    values[np.r_[0, starts]]):
+                self._execute(int(value), group)
+        self.steps += 1
+        return True
+
+    def run(self, inputs=None):
+        """
+        Run every lane until it halts or needs more input, after queueing
+        ``inputs`` if given.  Returns ``True`` if every lane halted.
+        """
+        if inputs is not None:
+            self.feed(inputs)
+        while self.step():
+            pass
+        return bool(self.halted.all())
+
+
+def run_batch(inp, inputs, chunk=4096):
+    """
+    Run ``inp`` once per row of the ``(N, k)`` array ``inputs``, ``chunk``
+    lanes at a time, and return the last output of each run.
+    """
+    inputs = np.asarray(inputs)
+    inputs = inputs.reshape(len(inputs), -1)
+    last = np.zeros(len(inputs), dtype=np.int64)
+    for start in range(0, len(inputs), chunk):
+        rows = inputs[start:start + chunk]
+        b = BatchComputer(inp, len(rows))
+        b.run(rows)
+        if b.wide:
+            last = last.astype(object)
+        last[start:start + chunk] = b.last_output
+    return last
@@ -0,0 +1,259 @@
+"""
+Instructions-per-second comparison between the shared ``Computer`` (run
+instruction by instruction, compiled a basic block at a time, and memoizing
+subroutine calls, where instructions skipped count as run) and the old
+day 23 ``Computer`` (kept in ``intcode.legacy``), and what compiled mode
+gains from optimizing blocks with ``intcode.ir``, plus the cost of building a
+fresh computer, which matters for days like 19 that build one per query, and
+the queries per second a ``ComputerPool`` gets by resetting computers instead,
+and a ``BatchComputer`` by running them all at once.  The last table is
+packets per second on the day 23 network, going round every computer in turn
+as the day's scripts used to and with ``Network``'s scheduler, and on a
+1,000-NIC network made of 20 copies of it, in one process, sharded over
+worker processes (which only helps with as many cores), and as
+``intcode.sharded.network`` picks for this machine.
+
+Run from the repository root with ``python -m intcode.bench``.
+"""
+import os
+import time
+import tracemalloc
+from functools import partial
+
+from .computer import Computer
+from .batch import run_batch
+from .legacy import LegacyComputer
+from .memory import ProgramImage
+from .network import Network
+from .sharded import ShardedNetwork, network
+from .pool import ComputerPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_program(day):
+    with open(os.path.join(ROOT, day, 'input'), 'r') as f:
+        return f.readline()
+
+
+def boost(cls, inp, mode):
+    c = cls('boost', inp, input_code=mode)
+    c.run_intcode()
+    return c.iteration - 1
+
+
+def tractor_beam(cls, inp, size=10):
+    total = 0
+    for y in range(size):
+        for x in range(size):
+            c = cls('tractorbeam', inp)
+            c.run_intcode(x)
+            c.run_intcode(y)
+            total += c.iteration - 1
+    return total
+
+
+def adventure(cls, inp):
+    c = cls('droid', inp)
+    c.run_intcode()
+    for command in ['east\n', 'east\n', 'south\n', 'west\n', 'inv\n']:
+        for char in command:
+            c.run_intcode(new_input=ord(char))
+    return c.iteration - 1
+
+
+WORKLOADS = [
+    ('day 09 BOOST part 1', '09', lambda cls, inp: boost(cls, inp, 1)),
+    ('day 09 BOOST part 2', '09', lambda cls, inp: boost(cls, inp, 2)),
+    ('day 19 10x10 scan', '19', tractor_beam),
+    ('day 25 adventure', '25', adventure),
+]
+
+
+class Unoptimized(Computer):
+    """A ``Computer`` whose blocks are compiled as decoded."""
+    optimize = False
+
+
+def fresh_image(inp):
+    """
+    An image of the program that no computer has run, so nothing is cached
+    or counted as hot yet.
+    """
+    return ProgramImage([int(i) for i in inp.split(',')])
+
+
+def measure(cls, workload, inp):
+    start = time.perf_counter()
+    instructions = workload(cls, inp)
+    return instructions, time.perf_counter() - start
+
+
+def construction(cls, inp, n=200):
+    """Return (seconds, bytes) per freshly built computer."""
+    cls('warmup', inp)
+    tracemalloc.start()
+    start = time.perf_counter()
+    computers = [cls(f'{i}', inp) for i in range(n)]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del computers
+    return elapsed / n, size / n
+
+
+def fresh_queries(cls, inp, points):
+    for x, y in points:
+        c = cls('tractorbeam', inp)
+        c.run_intcode(x)
+        c.run_intcode(y)
+
+
+def pooled_queries(inp, points):
+    pool = ComputerPool(inp)
+    for x, y in points:
+        pool.query([x, y])
+
+
+def round_robin(inp, n=50):
+    """
+    The day 23 scripts' old loop: every computer in turn, fed -1 when it has
+    no packet, up to the first packet sent to the NAT.  Returns the packets
+    delivered.
+    """
+    comps = [Computer(f'{i}', inp) for i in range(n)]
+    for i, c in enumerate(comps):
+        c.run_intcode(i)
+    queues = [[] for _ in range(n)]
+    packets = 0
+    while True:
+        for i, c in enumerate(comps):
+            if queues[i]:
+                x, y = queues[i].pop()
+                c.run_intcode(x)
+                c.run_intcode(y)
+            else:
+                c.run_intcode(-1)
+            out = c.this_runs_output
+            while len(out) > 2:
+                to, x, y = out[:3]
+                out = out[3:]
+                if to == 255:
+                    return packets
+                queues[to].append((x, y))
+                packets += 1
+            # the old idle check, rescanning every queue after each computer
+            sum(len(q) for q in queues)
+
+
+def scheduled(inp, part, copies=1):
+    network = Network(inp, copies=copies)
+    if part == 1:
+        network.run_until_nat()
+    else:
+        network.run_until_repeat()
+    return network.packets
+
+
+def sharded(inp, copies, workers):
+    with ShardedNetwork(inp, copies=copies, workers=workers) as network:
+        network.run_until_nat()
+        return network.packets
+
+
+def chosen(inp, copies):
+    with network(inp, copies=copies) as net:
+        net.run_until_nat()
+        return net.packets
+
+
+def packets_per_second(run):
+    start = time.perf_counter()
+    packets = run()
+    return packets / (time.perf_counter() - start)
+
+
+def queries_per_second(run, points):
+    start = time.perf_counter()
+    run(points)
+    return len(points) / (time.perf_counter() - start)
+
+
+def main():
+    print(f'{"workload":<22}{"instructions":>14}{"legacy ips":>14}'
+          f'{"shared ips":>14}{"speedup":>10}{"compiled ips":>14}'
+          f'{"speedup":>10}{"memoized ips":>14}{"speedup":>10}')
+    for name, day, workload in WORKLOADS:
+        inp = read_program(day)
+        n_old, t_old = measure(LegacyComputer, workload, inp)
+        n_new, t_new = measure(Computer, workload, inp)
+        n_comp, t_comp = measure(partial(Computer, compiled=True),
+                                 workload, inp)
+        n_memo, t_memo = measure(partial(Computer, memoize=True),
+                                 workload, inp)
+        assert n_old == n_new == n_comp == n_memo, \
+            f'{name}: instruction counts differ'
+        print(f'{name:<22}{n_new:>14,}{n_old / t_old:>14,.0f}'
+              f'{n_new / t_new:>14,.0f}{t_old / t_new:>9.1f}x'
+              f'{n_comp / t_comp:>14,.0f}{t_old / t_comp:>9.1f}x'
+              f'{n_memo / t_memo:>14,.0f}{t_old / t_memo:>9.1f}x')
+
+    print()
+    print(f'{"IR optimizer":<22}{"instructions":>14}{"unoptimized":>14}'
+          f'{"optimized":>14}{"speedup":>10}')
+    for name, day, workload in WORKLOADS:
+        inp = read_program(day)
+        n_raw, t_raw = measure(partial(Unoptimized, compiled=True),
+                               workload, fresh_image(inp))
+        n_opt, t_opt = measure(partial(Computer, compiled=True),
+                               workload, fresh_image(inp))
+        assert n_raw == n_opt, f'{name}: instruction counts differ'
+        print(f'{name:<22}{n_opt:>14,}{n_raw / t_raw:>14,.0f}'
+              f'{n_opt / t_opt:>14,.0f}{t_raw / t_opt:>9.1f}x')
+
+    print()
+    print(f'{"construction (day 19)":<22}{"legacy":>14}{"shared":>14}')
+    inp = read_program('19')
+    t_old, b_old = construction(LegacyComputer, inp)
+    t_new, b_new = construction(Computer, inp)
+    print(f'{"time per computer":<22}{t_old * 1e6:>12,.0f}us'
+          f'{t_new * 1e6:>12,.1f}us')
+    print(f'{"memory per computer":<22}{b_old / 1024:>12,.0f}kB'
+          f'{b_new / 1024:>12,.1f}kB')
+
+    print()
+    print(f'{"queries (day 19)":<22}{"legacy":>14}{"shared":>14}{"pooled":>14}'
+          f'{"batch":>14}')
+    points = [(x, y) for y in range(20) for x in range(20)]
+    q_old = queries_per_second(
+        lambda p: fresh_queries(LegacyComputer, inp, p), points)
+    q_new = queries_per_second(
+        lambda p: fresh_queries(Computer, inp, p), points)
+    q_pool = queries_per_second(lambda p: pooled_queries(inp, p), points)
+    q_batch = queries_per_second(lambda p: run_batch(inp, p), points)
+    print(f'{"queries per second":<22}{q_old:>14,.0f}{q_new:>14,.0f}'
+          f'{q_pool:>14,.0f}{q_batch:>14,.0f}')
+
+    print()
+    print(f'{"network (day 23)":<22}{"round robin":>14}{"scheduled":>14}')
+    inp = read_program('23')
+    p_old = packets_per_second(lambda: round_robin(inp))
+    p_new = packets_per_second(lambda: scheduled(inp, 1))
+    print(f'{"packets/s to the NAT":<22}{p_old:>14,.0f}{p_new:>14,.0f}')
+    p_new = packets_per_second(lambda: scheduled(inp, 2))
+    print(f'{"packets/s to a repeat":<22}{"":>14}{p_new:>14,.0f}')
+
+    print()
+    counts = (1, 2, 4)
+    print(f'{"1,000 NICs (20 x 23)":<22}{"one process":>14}'
+          + ''.join(f'{f"{w} worker" + "s" * (w > 1):>14}' for w in counts)
+          + f'{"network()":>14}   ({os.cpu_count()} cores)')
+    rates = [packets_per_second(lambda: scheduled(inp, 1, 20))]
+    rates += [packets_per_second(lambda: sharded(inp, 20, w)) for w in counts]
+    rates += [packets_per_second(lambda: chosen(inp, 20))]
+    print(f'{"packets/s to the NAT":<22}'
+          + ''.join(f'{rate:>14,.0f}' for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
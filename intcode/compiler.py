@@ -0,0 +1,234 @@
+"""
+Compiles straight-line runs of Intcode into Python functions.
+
+A block is the run of instructions from a given position up to and
+including the next jump or halt, as traced and optimized by ``intcode.ir``
+(so jumps that are always or never taken don't end it).  ``compile_block``
+turns one into the source of a single function, with every operand
+resolved: position-mode cells are read through page variables looked up
+once per block (and kept in local variables once read or written, until a
+relative-mode write might change them), constants are literals and the
+relative base lives in a local.  The function runs the whole block and
+returns the position to continue from, so the computer's run loop goes
+round once per block instead of once per instruction.
+
+Every write is checked against the computer's ``_owners``, the cells that
+steps and blocks were decoded from.  A write that hits one throws those away
+and leaves the block straight after the writing instruction, so
+self-modifying code is picked up the same way as by the interpreter.  The
+cells written that way are remembered (in the program image's
+``rewritten``), and later blocks stop short of any instruction decoded from
+one; such an instruction is left to the interpreter, so code that patches
+itself over and over isn't recompiled every time.  Inputs get a block of
+their own, since they can stop the program.
+"""
+from .computer import HALTED, NEEDS_INPUT
+from .ir import Cell, Const, Rel, trace
+from .loops import summarize
+from .memory import PAGE_BITS, PAGE_MASK
+
+_ARITH = {'add': '{0} + {1}', 'mul': '{0} * {1}',
+          'lt': '1 if {0} < {1} else 0', 'eq': '1 if {0} == {1} else 0',
+          'set': '{0}'}
+
+
+def format_op(op):
+    """A one-line description of an op, for comments in block source."""
+    args = []
+    for arg in op.args + ((op.dest,) if op.dest else ()):
+        if isinstance(arg, Const):
+            args.append(f'{arg.value}')
+        elif isinstance(arg, Cell):
+            args.append(f'[{arg.addr}]')
+        else:
+            args.append(f'[rb{arg.offset:+d}]')
+    return f'{op.kind.upper()} ' + ' '.join(args)
+
+
+class _BlockWriter():
+    """Builds the source of the function for one block."""
+    def __init__(self, ops, exit_pc, fixed_pages, loop):
+        self.ops = ops
+        self.exit_pc = exit_pc
+        self.loop = loop
+        # pages that every computer running this program has (the program's
+        # own), so they can be looked up once at the start of the block
+        self.fixed_pages = fixed_pages
+        self.page_vars = set()
+        # position -> local variable currently holding that cell
+        self.known = {}
+        self.sets_rel_base = any(op.kind == 'rb' for op in ops)
+        self.lines = []
+
+    def emit(self, line, indent=2):
+        self.lines.append('    ' * indent + line)
+
+    def cell(self, addr):
+        page, offset = addr >> PAGE_BITS, addr & PAGE_MASK
+        if page < self.fixed_pages:
+            self.page_vars.add(page)
+            return f'pg{page}[{offset}]'
+        return f'pages[{page}][{offset}]'
+
+    def read(self, arg, i):
+        """Return an expression for the value of operand ``i``."""
+        if isinstance(arg, Const):
+            return str(arg.value)
+        if isinstance(arg, Rel):
+            self.emit(f'a{i} = rb + {arg.offset}')
+            return f'pages[a{i} >> {PAGE_BITS}][a{i} & {PAGE_MASK}]'
+        if arg.addr not in self.known:
+            self.emit(f'c{arg.addr} = {self.cell(arg.addr)}')
+            self.known[arg.addr] = f'c{arg.addr}'
+        return self.known[arg.addr]
+
+    def exits(self, count, indent=2):
+        """Lines to run before leaving after ``count`` instructions."""
+        if self.sets_rel_base:
+            self.emit('vm.rel_base = rb', indent)
+        self.emit(f'vm.iteration += {count}', indent)
+
+    def store(self, op, value, count):
+        """
+        Write ``value`` to the op's destination, with the self-modifying
+        code guard.
+        """
+        if isinstance(op.dest, Rel):
+            self.emit(f'a2 = rb + {op.dest.offset}')
+            self.emit(f'pages[a2 >> {PAGE_BITS}][a2 & {PAGE_MASK}] = {value}')
+            # could have been any cell
+            self.known = {}
+            target = 'a2'
+        else:
+            addr = op.dest.addr
+            self.emit(f'c{addr} = {value}')
+            self.emit(f'{self.cell(addr)} = c{addr}')
+            self.known[addr] = f'c{addr}'
+            target = str(addr)
+        self.emit(f'if {target} in vm._owners:')
+        self.emit(f'vm._invalidate({target})', 3)
+        self.exits(count, 3)
+        self.emit(f'return {op.nxt}', 3)
+
+    def input_block(self, op):
+        dest = op.dest
+        if isinstance(dest, Rel):
+            addr = f'{dest.offset} + vm.rel_base'
+        else:
+            addr = str(dest.addr)
+        self.emit('value = vm._read_input()', 1)
+        self.emit('if value is None:', 1)
+        self.emit('return NEEDS_INPUT', 2)
+        self.emit(f'vm.mem[{addr}] = value', 1)
+        self.emit('vm.iteration += 1', 1)
+        self.emit(f'return {op.nxt}', 1)
+
+    def source(self):
+        ops = self.ops
+        if ops[0].kind == 'in':
+            self.input_block(ops[0])
+            return 'def block(vm, pages):\n' + '\n'.join(self.lines) + '\n'
+        for count, op in enumerate(ops):
+            kind, args = op.kind, op.args
+            self.emit(f'# {op.pc}: {format_op(op)}')
+            if kind == 'nop':
+                # a jump decided in advance
+                continue
+            if count:
+                self.emit(f'at = {count}')
+            if kind in _ARITH:
+                value = _ARITH[kind].format(*(self.read(arg, i)
+                                              for i, arg in enumerate(args)))
+                self.store(op, value, count + 1)
+            elif kind == 'out':
+                value = self.read(args[0], 0)
+                self.emit(f'vm._write_output({value}, {op.pc})')
+            elif kind == 'rb':
+                self.emit(f'rb += {self.read(args[0], 0)}')
+            elif kind in ('jnz', 'jz', 'goto'):
+                # operands are read before the counts are updated, in case
+                # reading one of them fails
+                if kind != 'goto':
+                    self.emit(f'test = {self.read(args[0], 0)}')
+                target = self.read(args[-1], 1)
+                if isinstance(args[-1], Rel):
+                    self.emit(f'target = {target}')
+                    target = 'target'
+                self.exits(count + 1)
+                if kind != 'goto':
+                    self.emit(f'if test {"!=" if kind == "jnz" else "=="} 0:')
+                    self.emit(f'return {target}', 3)
+                    target = op.nxt
+                self.emit(f'return {target}')
+            elif kind == 'halt':
+                self.exits(count)
+                self.emit(f'vm.pos = {op.pc}')
+                self.emit('return HALTED')
+        if self.exit_pc is not None:
+            self.exits(len(ops))
+            self.emit(f'return {self.exit_pc}')
+
+        head = ['def block(vm, pages):']
+        if self.loop:
+            # skip all but the last time round the loop, if it can be
+            head.append('    LOOP.skip(vm)')
+        head += ['    at = 0',
+                '    rb = vm.rel_base',
+                '    try:']
+        head += [f'        pg{page} = pages[{page}]'
+                 for page in sorted(self.page_vars)]
+        tail = ['    except (TypeError, IndexError, OverflowError, ValueError):',
+                '        # leave the computer at the instruction that failed,',
+                '        # so it can be retried once the memory (or the',
+                '        # frames an output went to) is sorted out',
+                f'        vm.pos = PCS[at]']
+        if self.sets_rel_base:
+            tail.append('        vm.rel_base = rb')
+        tail += ['        vm.iteration += at',
+                 '        raise']
+        return '\n'.join(head + self.lines + tail) + '\n'
+
+
+def block_source(ops, exit_pc, fixed_pages, loop=False):
+    """
+    Return the source of the function for a traced block, starting with a
+    call to ``LOOP.skip`` if ``loop`` is set.
+    """
+    return _BlockWriter(ops, exit_pc, fixed_pages, loop).source()
+
+
+def interpret_one(vm, pages):
+    """
+    Stand-in for a block that runs a single instruction with the
+    interpreter, for instructions whose code keeps being rewritten.
+    """
+    try:
+        step = vm._decoded[vm.pos]
+    except KeyError:
+        step = vm._decode(vm.pos)
+    nxt = step(vm, pages)
+    if nxt >= 0:
+        vm.iteration += 1
+    return nxt
+
+
+# it runs whatever is at the position when it's called, so writing to the
+# code there doesn't make it out of date
+interpret_one.lasting = True
+
+
+def compile_block(mem, pc, optimize=True):
+    """
+    Compile the block starting at ``pc`` in ``mem`` (a ``PagedMemory``).
+    Returns the block's function and the list of ``Op`` it was compiled from
+    (empty for ``interpret_one``).  ``optimize`` is passed on to ``trace``.
+    """
+    ops, exit_pc = trace(mem, pc, mem.image.rewritten, optimize)
+    if not ops:
+        return interpret_one, ops
+    loop = summarize(ops, pc)
+    src = block_source(ops, exit_pc, len(mem.image.pages), loop is not None)
+    namespace = {'HALTED': HALTED, 'NEEDS_INPUT': NEEDS_INPUT,
+                 'PCS': tuple(op.pc for op in ops), 'LOOP': loop}
+    exec(compile(src, f'<intcode block {pc}>', 'exec'), namespace)
+    return namespace['block'], ops
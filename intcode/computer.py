@@ -0,0 +1,715 @@
+"""
+The Intcode computer shared by all of the 2019 Intcode days.
+
+Every address is decoded at most once: the opcode and parameter modes are
+split apart, and the instruction is turned into a small ``step`` function with
+its operands already resolved (``mem[12]``, ``7``, ``mem[3 + rel_base]``...).
+The run loop then just looks up the step for the current position and calls
+it.  A write that lands on a cell something was decoded from throws the cached
+step away, so self-modifying programs still see their own changes.
+"""
+
+import copy
+import enum
+from collections import namedtuple
+
+from .memory import PAGE_BITS, PAGE_MASK, PagedMemory, load_image
+
+# values returned by a step in place of the next position
+HALTED = -1
+NEEDS_INPUT = -2
+# returned by run loops that can stop part way through a program
+PAUSED = -3
+
+# in compiled mode, a block is interpreted the first this many times it's
+# run (by any computer running the program), and compiled after that: most
+# code runs too few times for compiling it to pay
+HOT_BLOCK = 200
+
+
+class Stop(enum.Enum):
+    """Why ``Computer.run_until`` returned."""
+    HALTED = 'halted'
+    INPUT_NEEDED = 'input needed'
+    OUTPUTS = 'outputs'
+    PC = 'pc'
+    MAX_STEPS = 'max steps'
+
+
+# what run_until returns: the reason, and the values output on the way
+Stopped = namedtuple('Stopped', 'reason outputs')
+
+# number of parameters taken by each opcode
+NPARAMS = {1: 3, 2: 3, 3: 1, 4: 1, 5: 2, 6: 2, 7: 3, 8: 3, 9: 1, 99: 0}
+
+MNEMONICS = {1: 'ADD', 2: 'MULT', 3: 'INPUT', 4: 'OUTPUT',
+             5: 'JMP_IF_NONZERO', 6: 'JMP_IF_ZERO', 7: 'LESS_THAN',
+             8: 'EQUALS', 9: 'ADJ_RELBASE', 99: 'HALT'}
+
+# source fragments for each parameter mode (position, immediate, relative):
+# the address a parameter refers to, and how to read or store through it.
+# Position-mode addresses are constants, so their page number and offset
+# (h0, l0...) are worked out once when the step is built.  Writes never use
+# immediate mode, so mode 1 is stored through like position mode.
+_ADDR = {0: 'p{i}', 1: 'p{i}', 2: 'a{i}'}
+_READ = {0: 'pages[h{i}][l{i}]',
+         1: 'p{i}',
+         2: f'pages[a{{i}} >> {PAGE_BITS}][a{{i}} & {PAGE_MASK}]'}
+_STORE = {0: 'pages[h{i}][l{i}]',
+          1: 'pages[h{i}][l{i}]',
+          2: f'pages[a{{i}} >> {PAGE_BITS}][a{{i}} & {PAGE_MASK}]'}
+_PRELUDE = {2: 'a{i} = p{i} + vm.rel_base'}
+
+_INVALIDATE = ['if {a2} in vm._owners:',
+               '    vm._invalidate({a2})']
+
+_BODIES = {
+    1: ['{s2} = {r0} + {r1}',
+        *_INVALIDATE,
+        'return nxt'],
+    2: ['{s2} = {r0} * {r1}',
+        *_INVALIDATE,
+        'return nxt'],
+    # the input is stored through vm.mem so that a shared or missing page is
+    # dealt with there, rather than by retrying after the input is used up
+    # (vm.mem also takes care of invalidating any step decoded from the cell)
+    3: ['value = vm._read_input()',
+        'if value is None:',
+        '    return NEEDS_INPUT',
+        'vm.mem[{a0}] = value',
+        'return nxt'],
+    4: ['vm._write_output({r0}, pc)',
+        'return nxt'],
+    5: ['if {r0} != 0:',
+        '    return {r1}',
+        'return nxt'],
+    6: ['if {r0} == 0:',
+        '    return {r1}',
+        'return nxt'],
+    7: ['{s2} = 1 if {r0} < {r1} else 0',
+        *_INVALIDATE,
+        'return nxt'],
+    8: ['{s2} = 1 if {r0} == {r1} else 0',
+        *_INVALIDATE,
+        'return nxt'],
+    9: ['vm.rel_base += {r0}',
+        'return nxt'],
+    99: ['return HALTED'],
+}
+
+_factories = {}
+
+
+class _Shared():
+    """
+    A computer's ``_owners`` while its cache is shared: every cell counts as
+    one that code was decoded from, so the first write to memory goes to
+    ``_invalidate``, which gives the computer a cache of its own.  Otherwise
+    another computer could add a step decoded from the cell as loaded, which
+    this one has changed, to the cache they share.
+    """
+    def __init__(self, owners):
+        self.owners = owners
+
+    def __contains__(self, addr):
+        return True
+
+
+def step_factory(opcode, modes):
+    """
+    Return a function ``factory(pc, p0, p1, p2, nxt)`` that builds the step
+    for one instruction with the given opcode and parameter modes.  The
+    factories are generated the first time each combination is seen.
+    """
+    key = (opcode, modes)
+    if key not in _factories:
+        fields = {}
+        prelude = []
+        for i, mode in enumerate(modes + (0,) * (3 - len(modes))):
+            fields[f'a{i}'] = _ADDR[mode].format(i=i)
+            fields[f'r{i}'] = _READ[mode].format(i=i)
+            fields[f's{i}'] = _STORE[mode].format(i=i)
+            if mode in _PRELUDE and i < len(modes):
+                prelude.append(_PRELUDE[mode].format(i=i))
+        body = '\n'.join('        ' + line.format(**fields)
+                         for line in prelude + _BODIES[opcode])
+        src = (f'def factory(pc, p0, p1, p2, nxt):\n'
+               f'    h0, l0 = p0 >> {PAGE_BITS}, p0 & {PAGE_MASK}\n'
+               f'    h1, l1 = p1 >> {PAGE_BITS}, p1 & {PAGE_MASK}\n'
+               f'    h2, l2 = p2 >> {PAGE_BITS}, p2 & {PAGE_MASK}\n'
+               f'    def step(vm, pages):\n'
+               f'{body}\n'
+               f'    return step\n')
+        namespace = {'HALTED': HALTED, 'NEEDS_INPUT': NEEDS_INPUT}
+        exec(compile(src, f'<intcode {opcode} {modes}>', 'exec'), namespace)
+        _factories[key] = namespace['factory']
+    return _factories[key]
+
+
+def split_word(word):
+    """Return the opcode and parameter modes of an instruction word."""
+    opcode = word % 100
+    modes = (word // 100 % 10, word // 1000 % 10, word // 10000 % 10)
+    return opcode, modes[:NPARAMS.get(opcode, 0)]
+
+
+def decode(mem, pc):
+    """
+    Split the instruction at ``pc`` into its opcode, a tuple of parameter
+    modes and a tuple of raw parameter values.
+    """
+    value = mem[pc]
+    opcode, modes = split_word(value)
+    if opcode not in NPARAMS:
+        raise ValueError(f'Unknown opcode {value} at position {pc}')
+    nparams = NPARAMS[opcode]
+    if any(m > 2 for m in modes):
+        raise ValueError('Parameter mode should be either 0, 1, or 2 '
+                         f'(got {value} at position {pc})')
+    params = tuple(mem[pc + i + 1] for i in range(nparams))
+    return opcode, modes, params
+
+
+def disassemble(mem, pc):
+    """
+    Return a one-line, human readable version of the instruction at ``pc``.
+    """
+    return format_instr(*decode(mem, pc))
+
+
+def format_instr(opcode, modes, params):
+    """Format a decoded instruction the way ``disassemble`` does."""
+    args = []
+    for mode, p in zip(modes, params):
+        if mode == 0:
+            args.append(f'[{p}]')
+        elif mode == 1:
+            args.append(f'{p}')
+        else:
+            args.append(f'[rb{p:+d}]')
+    return f'{MNEMONICS[opcode]} ' + ' '.join(args)
+
+
+class Computer():
+    """
+    An Intcode computer.
+
+    ``run_intcode`` runs until the program halts (returns ``False``) or needs
+    an input that it doesn't have (returns ``None``); calling it again resumes
+    where it left off.  Inputs come from ``input_stack`` first, then from the
+    ``new_input`` passed to ``run_intcode``, then from the keyboard if
+    ``interactive`` is set.
+
+    ``mem`` is a ``PagedMemory`` over the program's shared image; it reads and
+    writes like a list, and may be edited at any time (e.g. ``c.mem[0] = 2``);
+    any instruction decoded from a cell written that way is thrown away.
+
+    With ``compiled`` set, the program is run a basic block at a time, each
+    block compiled to a Python function by ``intcode.compiler`` once it has
+    been run ``HOT_BLOCK`` times.  With
+    ``memoize`` set, subroutine calls that don't do I/O are remembered and
+    skipped when repeated with the same arguments (see ``intcode.memo``).
+    With ``profile`` set, the instructions run are counted and timed in
+    ``profiler`` (see ``intcode.profiler``); ``profile`` can also be the
+    profiler to use, e.g. a ``CallGraph``, or one shared with other
+    computers.  With ``trace`` (a path or a binary file), every instruction
+    run is logged to it (see ``intcode.tracelog``); ``tracer.close()`` when
+    done.  With ``record`` set to a number of instructions ``K``, the inputs
+    taken are logged and a snapshot kept every ``K`` instructions, so that
+    ``recorder.seek(n)`` can give back the computer as it was ``n``
+    instructions in (see ``intcode.replay``); changes made to ``mem`` from
+    outside once it has started running aren't recorded.  With ``frames``
+    set to a record size (or a ``Frames``), outputs are gathered into
+    records in ``frames`` and kept in neither ``total_output`` nor
+    ``this_runs_output`` (see ``intcode.framing``).  ``output_count``
+    counts the outputs either way.
+    """
+    # whether blocks are optimized (by ``intcode.ir``) before they're
+    # compiled; only turned off to measure what that gains
+    optimize = True
+
+    def __init__(self, name, inp,
+                 phase_setting=None, input_code=None,
+                 interactive=False, debug_level='off', compiled=False,
+                 memoize=False, profile=False, trace=None, record=None,
+                 frames=None):
+        self.name = name
+        self.mem = PagedMemory(load_image(inp))
+        self.mem.on_write = self._written
+        self.interactive = interactive
+        self.debug_level = debug_level
+        self.compiled = compiled
+        self.memoize = memoize
+        self.profiler = None
+        if profile is True:
+            from .profiler import Profiler
+            self.profiler = Profiler()
+        elif profile:
+            self.profiler = profile
+        self.tracer = None
+        if trace is not None:
+            from .tracelog import TraceWriter
+            self.tracer = TraceWriter(trace)
+        self.recorder = None
+        if record is not None:
+            from .replay import Recorder
+            self.recorder = Recorder(record)
+        self.frames = None
+        if isinstance(frames, int):
+            from .framing import Frames
+            self.frames = Frames(frames)
+        elif frames is not None:
+            self.frames = frames
+        self.reset()
+        if phase_setting is not None:
+            self.input_stack += [phase_setting]
+        if input_code is not None:
+            self.input_stack += [input_code]
+
+    def reset(self):
+        """
+        Put the computer back the way it was built, reverting only the memory
+        pages the program wrote to.  Inputs and outputs are cleared.
+        """
+        self.mem.reset()
+        if self.recorder is not None:
+            self.recorder.clear()
+        if self.frames is not None:
+            self.frames.clear()
+        self.input_stack = []
+        self.pos = 0
+        self.rel_base = 0
+        self.iteration = 1
+        self.output = None
+        self.last_output = None
+        self.output_pos = None
+        self.cur_opcode = None
+        self.total_output = []
+        self.this_runs_output = []
+        self.output_count = 0
+        self._new_input = None
+        # position -> step, position -> compiled block, and cell ->
+        # positions of the steps and blocks decoded from it.  These start out
+        # as the image's cache of those decoded from the unmodified program,
+        # and are shared (with the image, or with forks) until this computer
+        # needs to change them.
+        self._decoded = self.mem.image.decoded
+        self._blocks = self.mem.image.blocks
+        self._owners = _Shared(self.mem.image.owners)
+        self._cache_shared = True
+        # the CallMemo, made when first run with memoize set
+        self._memo = None
+
+    def _own_cache(self):
+        if self._cache_shared:
+            self._decoded = dict(self._decoded)
+            self._blocks = dict(self._blocks)
+            self._owners = dict(self._owners.owners)
+            self._cache_shared = False
+
+    def _decode(self, pc):
+        self._own_cache()
+        opcode, modes, params = decode(self.mem, pc)
+        nxt = pc + len(params) + 1
+        params = params + (0,) * (3 - len(params))
+        step = step_factory(opcode, modes)(pc, *params, nxt)
+        self._cache(self._decoded, 'decoded', pc, step, range(pc, nxt))
+        return step
+
+    def _compile(self, pc):
+        from .compiler import compile_block
+        self._own_cache()
+        block, instrs = compile_block(self.mem, pc, self.optimize)
+        cells = [addr for i in instrs for addr in range(i.pc, i.nxt)]
+        self._cache(self._blocks, 'blocks', pc, block, cells)
+        return block
+
+    def _cache(self, cache, image_cache, pc, item, cells):
+        """
+        Add a step or block decoded from ``cells`` to ``cache``, and to the
+        image's matching cache if the cells hold the program as loaded.
+        """
+        caches = [(cache, self._owners)]
+        image = self.mem.image
+        if all(self.mem[addr] == image[addr] for addr in cells):
+            # decoded from the program as loaded, so any other computer
+            # running this program can start out with it too
+            caches.append((getattr(image, image_cache), image.owners))
+        for decoded, owners in caches:
+            decoded[pc] = item
+            # tuples rather than lists, so a fork can share this dict's values
+            for addr in cells:
+                pcs = owners.get(addr, ())
+                if pc not in pcs:
+                    owners[addr] = pcs + (pc,)
+
+    def _addresses(self, pc):
+        """
+        Return the addresses read and written by the instruction at ``pc``.
+        """
+        opcode, modes, params = decode(self.mem, pc)
+        addrs = [p + self.rel_base if m == 2 else p
+                 for m, p in zip(modes, params)]
+        # the last parameter of these is always the address written to
+        split = len(addrs) - (opcode in (1, 2, 3, 7, 8))
+        reads = [a for a, m in zip(addrs[:split], modes) if m != 1]
+        return reads, addrs[split:]
+
+    def _invalidate(self, addr):
+        self._own_cache()
+        if addr not in self._owners:
+            # only here to stop sharing the cache
+            return
+        for pc in self._owners.pop(addr):
+            self._decoded.pop(pc, None)
+            if not getattr(self._blocks.get(pc), 'lasting', False):
+                self._blocks.pop(pc, None)
+        image = self.mem.image
+        if addr not in image.rewritten:
+            # self-modifying code: compile blocks around this cell from now
+            # on, in every computer running the program
+            image.rewritten.add(addr)
+            for pc in image.owners.get(addr, ()):
+                image.blocks.pop(pc, None)
+
+    def _written(self, addr):
+        if addr in self._owners:
+            self._invalidate(addr)
+        if self._memo is not None and addr in self._memo.code:
+            self._memo.clear()
+
+    def fork(self, name=None):
+        """
+        Return an independent copy of this computer, as it is now.
+
+        The copy has its own position, relative base, input stack and
+        outputs, and shares memory pages (and decoded instructions) with this
+        one until either of them writes to a page, so forking costs time and
+        memory in proportion to the pages in use, not the address space.
+        """
+        other = copy.copy(self)
+        if name is not None:
+            other.name = name
+        other.mem = self.mem.fork()
+        other.mem.on_write = other._written
+        other._memo = None
+        other.recorder = None
+        if self.frames is not None:
+            other.frames = self.frames.fork()
+        other.input_stack = list(self.input_stack)
+        other.total_output = list(self.total_output)
+        other.this_runs_output = list(self.this_runs_output)
+        if not self._cache_shared:
+            self._owners = _Shared(self._owners)
+            self._cache_shared = True
+        other._owners = self._owners
+        other._cache_shared = True
+        return other
+
+    def snapshot(self):
+        """
+        Return a fork to come back to later with ``restore``.  A snapshot can
+        be restored any number of times.
+        """
+        return self.fork()
+
+    def restore(self, snapshot):
+        """Put this computer back in the state saved by ``snapshot``."""
+        recorder = self.recorder
+        self.__dict__.update(snapshot.fork(self.name).__dict__)
+        self.mem.on_write = self._written
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.rewind(self.iteration - 1)
+
+    def save(self, path, compress=False):
+        """
+        Save this computer's state to ``path`` (a path or a binary file),
+        zlib-compressed if ``compress`` is set (see ``intcode.state``).
+        """
+        from .state import dump
+        if isinstance(path, str):
+            with open(path, 'wb') as f:
+                dump(self, f, compress)
+        else:
+            dump(self, path, compress)
+
+    @classmethod
+    def load(cls, path, inp, name='loaded', **kwargs):
+        """
+        Return a computer running ``inp`` in the state saved to ``path``,
+        built with ``kwargs`` as for the constructor.  Raises
+        ``ValueError`` if the state was saved from a different program.
+        """
+        from .state import load
+        computer = cls(name, inp, **kwargs)
+        if isinstance(path, str):
+            with open(path, 'rb') as f:
+                return load(f, computer)
+        return load(path, computer)
+
+    def _read_input(self):
+        if len(self.input_stack) > 0:
+            return int(self.input_stack.pop(0))
+        if self._new_input is not None:
+            input_code = int(self._new_input)
+            # make sure to clear new_input, so we don't think we got another
+            # input the next time we see an opcode 3
+            self._new_input = None
+            return input_code
+        if self.interactive:
+            try:
+                return int(input('Enter input for intcode computer: '))
+            except ValueError:
+                return None
+        return None
+
+    def _write_output(self, value, pc):
+        if self.frames is not None:
+            # first, so that an output the frames refuse isn't counted
+            self.frames.push(value)
+        self.last_output = value
+        self.output = value
+        self.output_pos = pc
+        self.output_count += 1
+        if self.frames is None:
+            self.total_output.append(value)
+            self.this_runs_output.append(value)
+
+    def print_mem_array(self):
+        print('indx: ', end='')
+        for num in range(len(self.mem)):
+            print(f'{num:4g} ', end='')
+        print('')
+        print('vals: ', end='')
+        for num in self.mem[:100]:
+            print(f'{num:4g} ', end='')
+        print('')
+
+    def dbg_print(self, string, space='\t', newline=False):
+        if self.debug_level == 'all':
+            print(space + string,
+                  end='' if not newline else '\n')
+        if self.debug_level == 'output':
+            if self.cur_opcode in [3, 4]:
+                print(space + string,
+                      end='' if not newline else '\n')
+
+    def run_intcode(self, new_input=None):
+        """
+        Run until the program halts or runs out of input.
+
+        Returns ``False`` if the program halted and ``None`` if it is waiting
+        for input.  Outputs produced by this call are in ``this_runs_output``.
+        """
+        self.this_runs_output = []
+        self._new_input = new_input
+        if self.debug_level != 'off':
+            run = self._run_debug
+        elif self.recorder is not None:
+            run = self._run_recorded
+        elif self.tracer is not None:
+            run = self._run_traced
+        elif self.profiler is not None:
+            run = self._run_profiled
+        elif self.memoize:
+            run = self._run_memo
+        elif self.compiled:
+            run = self._run_compiled
+        else:
+            run = self._run
+        try:
+            status = self._run_faults(run)
+        finally:
+            self._new_input = None
+
+        if status == NEEDS_INPUT:
+            self.cur_opcode = 3
+            self.output = self.last_output
+            return None
+        self.cur_opcode = 99
+        return False
+
+    def run_until(self, outputs=None, pc=None, max_steps=None, inputs=()):
+        """
+        Run until the program halts or needs an input it doesn't have, or
+        sooner: once it has output ``outputs`` more values, when it jumps or
+        steps to position ``pc``, or after ``max_steps`` instructions.
+        ``inputs`` are queued first.  Returns a ``Stopped`` with the ``Stop``
+        reason and the new outputs, which are also in ``this_runs_output``
+        (with ``frames``, there are none: they are in ``frames``).
+
+        Instructions are run one at a time by the interpreter, even with
+        ``compiled`` or ``memoize`` set (which only change how fast they
+        run).  Raises ``ValueError`` if the computer is recording, tracing
+        or profiling, as its log, trace or profile would miss them.
+        """
+        for attr in ('recorder', 'tracer', 'profiler'):
+            if getattr(self, attr) is not None:
+                raise ValueError(f"run_until can't be used with a {attr} "
+                                 f"attached; use run_intcode")
+        self.input_stack += inputs
+        self.this_runs_output = []
+        want = None if outputs is None else self.output_count + outputs
+        deadline = None if max_steps is None else self.iteration + max_steps
+        status = self._run_faults(
+            lambda: self._run_until(want, pc, deadline))
+        if status == NEEDS_INPUT:
+            self.cur_opcode = 3
+            self.output = self.last_output
+            status = Stop.INPUT_NEEDED
+        elif status == HALTED:
+            self.cur_opcode = 99
+            status = Stop.HALTED
+        return Stopped(status, list(self.this_runs_output))
+
+    def _run_until(self, want, stop_pc, deadline):
+        pages = self.mem.pages
+        pc = self.pos
+        count = 0
+        try:
+            while True:
+                if deadline is not None and self.iteration + count >= deadline:
+                    return Stop.MAX_STEPS
+                try:
+                    step = self._decoded[pc]
+                except KeyError:
+                    step = self._decode(pc)
+                nxt = step(self, pages)
+                if nxt < 0:
+                    return nxt
+                pc = nxt
+                count += 1
+                if pc == stop_pc:
+                    return Stop.PC
+                if want is not None and self.output_count >= want:
+                    return Stop.OUTPUTS
+        finally:
+            self.pos = pc
+            self.iteration += count
+
+    def _run_faults(self, run):
+        """Call the run loop ``run``, sorting out any memory faults."""
+        while True:
+            try:
+                return run()
+            except (TypeError, IndexError, OverflowError) as e:
+                # the instruction at self.pos touched a page that is shared,
+                # not allocated yet, or too narrow for the value; sort that
+                # out and run the instruction again
+                reads, writes = self._addresses(self.pos)
+                overflow = isinstance(e, OverflowError)
+                if not self.mem.fault(reads, writes, overflow):
+                    raise
+
+    def _run(self):
+        pages = self.mem.pages
+        pc = self.pos
+        count = 0
+        try:
+            while True:
+                # looked up each time: a step can swap in a private copy of
+                # the cache when it invalidates an entry shared with a fork
+                try:
+                    step = self._decoded[pc]
+                except KeyError:
+                    step = self._decode(pc)
+                nxt = step(self, pages)
+                if nxt < 0:
+                    return nxt
+                pc = nxt
+                count += 1
+        finally:
+            self.pos = pc
+            self.iteration += count
+
+    def _run_compiled(self):
+        """
+        The same as ``_run``, a block at a time.  Blocks count their own
+        instructions, and set ``pos`` themselves if they stop part way.
+        """
+        pages = self.mem.pages
+        heat = self.mem.image.heat
+        pc = self.pos
+        while True:
+            self.pos = pc
+            try:
+                block = self._blocks[pc]
+            except KeyError:
+                if heat.get(pc, 0) < HOT_BLOCK:
+                    pc = self._run_cold(pc)
+                    if pc < 0:
+                        return pc
+                    continue
+                block = self._compile(pc)
+            pc = block(self, pages)
+            if pc < 0:
+                return pc
+
+    def _run_cold(self, pc):
+        """
+        Interpret from ``pc``, the start of a block not run enough to be
+        compiled yet, until a jump lands on a block that is compiled or now
+        should be.  Returns the position to go on from, or the status if the
+        program stopped.
+        """
+        pages = self.mem.pages
+        heat = self.mem.image.heat
+        heat[pc] = heat.get(pc, 0) + 1
+        count = 0
+        try:
+            while True:
+                try:
+                    step = self._decoded[pc]
+                except KeyError:
+                    step = self._decode(pc)
+                nxt = step(self, pages)
+                if nxt < 0:
+                    return nxt
+                count += 1
+                if not pc < nxt <= pc + 4:
+                    # a jump, so the start of a block
+                    if nxt in self._blocks:
+                        return nxt
+                    runs = heat[nxt] = heat.get(nxt, 0) + 1
+                    if runs >= HOT_BLOCK:
+                        return nxt
+                pc = nxt
+        finally:
+            self.pos = pc
+            self.iteration += count
+
+    def _run_recorded(self):
+        return self.recorder.run(self)
+
+    def _run_traced(self):
+        return self.tracer.run(self)
+
+    def _run_profiled(self):
+        return self.profiler.run(self)
+
+    def _run_memo(self):
+        from .memo import CallMemo
+        if self._memo is None:
+            self._memo = CallMemo()
+        return self._memo.run(self)
+
+    def _run_debug(self):
+        """The same as ``_run``, but printing each instruction as it goes."""
+        while True:
+            pc = self.pos
+            self.cur_opcode = self.mem[pc] % 100
+            self.dbg_print(f'{self.name}:', space='\n')
+            self.dbg_print(f'({pc:04g})', space='\t')
+            self.dbg_print(disassemble(self.mem, pc))
+            step = self._decoded.get(pc) or self._decode(pc)
+            nxt = step(self, self.mem.pages)
+            if nxt == NEEDS_INPUT:
+                self.dbg_print('\t| no new input; pausing', newline=True)
+                return nxt
+            if nxt < 0:
+                return nxt
+            if self.cur_opcode == 4:
+                self.dbg_print(f'\t* **OUTPUT** {self.last_output}')
+            self.pos = nxt
+            self.iteration += 1
@@ -0,0 +1,79 @@
+"""
+Intcode computers wired straight to the devices they drive.
+
+A ``Device`` is whatever sits on the other end of a program's inputs and
+outputs: a robot, a game's joystick and screen, a terminal.  A
+``DeviceComputer`` calls its device's ``read`` when an input instruction
+runs out of ``input_stack`` and ``write`` for every output, from inside the
+run loop, so the device keeps its own state and reacts to each value as it
+comes, and a whole session is one ``run`` rather than a round trip through
+the caller for every input.
+
+``read`` may return ``None`` when the device has nothing to give yet; the
+computer then stops as if it had run out of input, and ``run`` can be
+called again once the device is ready.
+
+A fork of a ``DeviceComputer`` (and so a snapshot, or a computer a recorder
+seeks to) isn't attached to the original's device, whose state would
+otherwise be changed by whatever the fork runs; give it a device of its
+own.
+"""
+from .computer import Computer
+
+
+class Device():
+    """
+    The interface a ``DeviceComputer`` drives.  This one has nothing to
+    read and ignores what is written to it.
+    """
+    def read(self):
+        """Return the next input, or ``None`` if there isn't one yet."""
+        return None
+
+    def write(self, value):
+        """Take one output."""
+
+
+class DeviceComputer(Computer):
+    """
+    A ``Computer`` attached to ``device``.  Inputs queued in ``input_stack``
+    (e.g. a ``phase_setting``) are still taken first.  Other arguments are
+    as for ``Computer``.
+    """
+    def __init__(self, name, inp, device, **kwargs):
+        super().__init__(name, inp, **kwargs)
+        self.device = device
+
+    def fork(self, name=None, device=None):
+        """
+        As ``Computer.fork``, but the copy is attached to ``device``, or to
+        a plain ``Device`` if none is given, never to this computer's: a
+        device keeps its own state, and a fork (e.g. a recorder's snapshot
+        being sought) running into it would change it.
+        """
+        other = super().fork(name)
+        other.device = Device() if device is None else device
+        return other
+
+    def restore(self, snapshot):
+        """As ``Computer.restore``, staying attached to the same device."""
+        device = self.device
+        super().restore(snapshot)
+        self.device = device
+
+    def _read_input(self):
+        value = super()._read_input()
+        if value is None:
+            value = self.device.read()
+        return value
+
+    def _write_output(self, value, pc):
+        super()._write_output(value, pc)
+        self.device.write(value)
+
+    def run(self):
+        """
+        Run until the program halts (returns ``True``) or the device has no
+        input for it (returns ``False``).
+        """
+        return self.run_intcode() is False
@@ -0,0 +1,142 @@
+"""
+Outputs framed into fixed-size records, with bounded retention.
+
+Many programs output records of a fixed number of values: day 13's tiles
+(x, y, tile) and day 23's packets (address, x, y).  A ``Frames`` gathers
+outputs into records of its ``arity`` as they are written, so a consumer
+gets each record once, whole, from ``take`` (or ``push``'s return value),
+and never has to slice or re-scan the outputs.
+
+A ``Computer`` built with ``frames=`` (an arity, or a ``Frames``) writes its
+outputs there instead of keeping them in ``total_output`` and
+``this_runs_output``, and how much is kept is up to the ``Frames``.
+Records wait in ``ready`` until they are taken, so whoever runs the
+computer has to ``take`` them as it goes (or build the ``Frames`` with
+``queue=False`` if nothing will).  ``ready`` has no bound unless given one
+(``max_ready``): a ``Frames`` that is never taken from holds every record.
+A full ``ready`` refuses the output that would complete one more record,
+which stops the run with the output instruction still to run, so it runs
+again once records have been taken.  Past that, the ``Frames`` keeps nothing
+(the default), the last ``keep`` records, or every record (``keep=None``).
+With ``spill`` (a path, or a file opened for binary writing) every record
+is also written to a file as it completes, to be read back with
+``read_spill``, so a long run can be kept whole on disk while its memory
+use stays the same.
+"""
+import struct
+from collections import deque
+
+MAGIC = b'ICFR'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+
+class Frames():
+    """
+    Records of ``arity`` outputs.  Records not yet taken wait in ``ready``
+    (unless ``queue`` is off), up to ``max_ready`` of them if that is given,
+    the last ``keep`` of them are in ``kept``
+    (all of them if ``keep`` is ``None``), and every one is written to
+    ``spill`` if given; ``count`` is how many there have been.  ``close`` it
+    when done with a spill file (a file given to it is only flushed).
+    """
+    def __init__(self, arity, keep=0, spill=None, queue=True,
+                 max_ready=None):
+        self.arity = arity
+        self.keep = keep
+        self.queue = queue
+        self.max_ready = max_ready
+        self.record = struct.Struct(f'<{arity}q')
+        self.file = None
+        self.owned = False
+        if spill is not None:
+            if isinstance(spill, str):
+                self.file = open(spill, 'wb')
+                self.owned = True
+            else:
+                self.file = spill
+            self.file.write(HEADER.pack(MAGIC, VERSION, arity))
+        self.clear()
+
+    def clear(self):
+        """Forget the records held, and any record not yet complete."""
+        self._partial = []
+        self.ready = deque()
+        self.kept = [] if self.keep is None else deque(maxlen=self.keep)
+        self.count = 0
+
+    def fork(self):
+        """
+        Return a copy holding the same records, for a forked computer.  The
+        copy doesn't spill.
+        """
+        other = Frames(self.arity, self.keep, queue=self.queue,
+                       max_ready=self.max_ready)
+        other._partial = list(self._partial)
+        other.ready = deque(self.ready)
+        other.kept = (list(self.kept) if self.keep is None
+                      else deque(self.kept, maxlen=self.keep))
+        other.count = self.count
+        return other
+
+    def push(self, value):
+        """
+        Add one output.  Returns the record it completes, if it does (the
+        record is also put in ``ready``).  Raises ``ValueError``, having
+        added nothing, if ``ready`` already holds ``max_ready`` records, or
+        if the record is to be spilled and a value in it doesn't fit in 64
+        bits.
+        """
+        partial = self._partial
+        if len(partial) + 1 < self.arity:
+            partial.append(value)
+            return None
+        if (self.queue and self.max_ready is not None
+                and len(self.ready) >= self.max_ready):
+            raise ValueError(f'{len(self.ready)} records are waiting to be '
+                             f'taken')
+        record = tuple(partial) + (value,)
+        if self.file is not None:
+            try:
+                packed = self.record.pack(*record)
+            except struct.error:
+                raise ValueError(f'record {record} does not fit in 64-bit '
+                                 f'values') from None
+            self.file.write(packed)
+        self._partial = []
+        self.count += 1
+        if self.queue:
+            self.ready.append(record)
+        if self.keep != 0:
+            self.kept.append(record)
+        return record
+
+    def take(self):
+        """Return the records completed since the last ``take``."""
+        ready = self.ready
+        self.ready = deque()
+        return ready
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def read_spill(path):
+    """Yield the records spilled to the file at ``path``."""
+    with open(path, 'rb') as f:
+        magic, version, arity = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a file of Intcode records')
+        if version != VERSION:
+            raise ValueError(f'{path} is version {version}, not {VERSION}')
+        record = struct.Struct(f'<{arity}q')
+        while True:
+            chunk = f.read(record.size * 4096)
+            if not chunk:
+                break
+            yield from record.iter_unpack(chunk)
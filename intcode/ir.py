@@ -0,0 +1,175 @@
+"""
+A small intermediate representation of Intcode, and the optimizations made
+on it before a block is compiled.
+
+``trace`` decodes a run of instructions into ``Op``s whose operands are
+``Const``, ``Cell`` (position mode) or ``Rel`` (relative mode), and
+optimizes them as it goes:
+
+* arithmetic and comparisons on constants are folded, and so are the
+  trivial ``x + 0``, ``x * 1`` and ``x * 0`` forms;
+* a cell the block has stored a constant in reads as that constant until
+  something else might have changed it.  Cells the block didn't write itself
+  are never assumed to hold anything, and a relative-mode write, which could
+  land anywhere, forgets every constant;
+* a conditional jump whose condition is known either falls through or is
+  always taken, and an always-taken jump to a known target is followed
+  (which threads chains of jumps), so the code after it, which can't be
+  reached from here, is never decoded.
+
+Skipped jumps stay in the trace as ``nop`` ops, since they still count as
+executed instructions.  A trace stops at a jump that has to be decided at
+run time, an input, a halt, or a position it has already been through.
+"""
+from collections import namedtuple
+
+from .computer import decode
+
+# traces are cut after this many instructions
+MAX_OPS = 64
+
+
+def _operand(name, field):
+    """
+    A namedtuple type whose values are only ever equal to values of the same
+    type, so that e.g. ``Cell(5)`` and ``Rel(5)`` can both be dict keys.
+    """
+    base = namedtuple(name, field)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((name, tuple.__hash__(self)))
+
+    return type(name, (base,), {'__slots__': (), '__eq__': __eq__,
+                                '__ne__': __ne__, '__hash__': __hash__})
+
+
+Const = _operand('Const', 'value')
+Cell = _operand('Cell', 'addr')
+Rel = _operand('Rel', 'offset')
+
+# one instruction: its position, kind, operands, where its result goes (if
+# anywhere), and the position of the instruction after it in memory
+Op = namedtuple('Op', 'pc kind args dest nxt')
+
+KINDS = {1: 'add', 2: 'mul', 3: 'in', 4: 'out', 5: 'jnz', 6: 'jz',
+         7: 'lt', 8: 'eq', 9: 'rb', 99: 'halt'}
+
+_FOLD = {'add': lambda a, b: a + b,
+         'mul': lambda a, b: a * b,
+         'lt': lambda a, b: 1 if a < b else 0,
+         'eq': lambda a, b: 1 if a == b else 0}
+
+# kinds that end a trace
+EXITS = ('in', 'jnz', 'jz', 'goto', 'halt')
+
+
+def is_const(arg, value):
+    return arg == Const(value)
+
+
+def operand(mode, p):
+    if mode == 1:
+        return Const(p)
+    if mode == 2:
+        return Rel(p)
+    return Cell(p)
+
+
+def lower(pc, opcode, modes, params):
+    """Turn a decoded instruction into an ``Op``."""
+    nxt = pc + len(params) + 1
+    args = tuple(operand(m, p) for m, p in zip(modes, params))
+    dest = None
+    if opcode in (1, 2, 3, 7, 8):
+        # writes never use immediate mode; mode 1 stores like mode 0
+        *args, dest = args
+        args = tuple(args)
+        if isinstance(dest, Const):
+            dest = Cell(dest.value)
+    return Op(pc, KINDS[opcode], args, dest, nxt)
+
+
+def simplify(op, consts):
+    """
+    Return ``op`` with known cells replaced by constants and folded, and
+    update ``consts`` (cell -> constant value) for its effects.
+    """
+    args = tuple(Const(consts[a.addr]) if isinstance(a, Cell) and
+                 a.addr in consts else a for a in op.args)
+    op = op._replace(args=args)
+    if op.kind in _FOLD:
+        x, y = args
+        if isinstance(x, Const) and isinstance(y, Const):
+            op = op._replace(kind='set',
+                             args=(Const(_FOLD[op.kind](x.value, y.value)),))
+        elif op.kind == 'add' and is_const(x, 0):
+            op = op._replace(kind='set', args=(y,))
+        elif op.kind == 'add' and is_const(y, 0):
+            op = op._replace(kind='set', args=(x,))
+        elif op.kind == 'mul' and (is_const(x, 0) or is_const(y, 0)):
+            op = op._replace(kind='set', args=(Const(0),))
+        elif op.kind == 'mul' and is_const(x, 1):
+            op = op._replace(kind='set', args=(y,))
+        elif op.kind == 'mul' and is_const(y, 1):
+            op = op._replace(kind='set', args=(x,))
+    elif op.kind in ('jnz', 'jz') and isinstance(args[0], Const):
+        taken = (args[0].value != 0) == (op.kind == 'jnz')
+        if not taken:
+            op = op._replace(kind='nop', args=(Const(op.nxt),))
+        elif isinstance(args[1], Const):
+            op = op._replace(kind='nop', args=(args[1],))
+        else:
+            op = op._replace(kind='goto', args=(args[1],))
+
+    dest = op.dest
+    if isinstance(dest, Rel):
+        consts.clear()
+    elif isinstance(dest, Cell):
+        if op.kind == 'set' and isinstance(op.args[0], Const):
+            consts[dest.addr] = op.args[0].value
+        else:
+            consts.pop(dest.addr, None)
+    return op
+
+
+def trace(mem, pc, avoid=(), optimize=True):
+    """
+    Decode and optimize the instructions run from ``pc``, up to the first
+    one whose next position isn't known in advance.  Instructions that use a
+    cell in ``avoid`` aren't included, and an input is only ever the first
+    and only op.  With ``optimize`` off the ops are left as decoded, so the
+    trace stops at the first jump.
+
+    Returns the ops, and the position to carry on from after the last one
+    (``None`` if the last op decides that itself).
+    """
+    ops = []
+    consts = {}
+    seen = set()
+    while len(ops) < MAX_OPS and pc not in seen:
+        try:
+            opcode, modes, params = decode(mem, pc)
+        except ValueError:
+            if not ops:
+                raise
+            # leave the bad instruction for when (if) it's reached
+            break
+        if opcode == 3 and ops:
+            break
+        if any(addr in avoid for addr in range(pc, pc + len(params) + 1)):
+            break
+        seen.add(pc)
+        op = lower(pc, opcode, modes, params)
+        if optimize:
+            op = simplify(op, consts)
+        ops.append(op)
+        if op.kind in EXITS:
+            return ops, None
+        pc = op.args[0].value if op.kind == 'nop' else op.nxt
+    return ops, pc
@@ -0,0 +1,141 @@
+"""
+Loading a program once, and handing it to other processes without copying.
+
+``load_program`` reads a puzzle input and returns its ``ProgramImage``.  The
+parsed program is kept in ``CACHE_DIR`` (``intcode`` under
+``$XDG_CACHE_HOME``, or ``~/.cache``) as raw int64 values, in a file named
+after the input and hashes of its path and contents (so an edited input is
+parsed again), and after the first run loading it is a read rather than a
+parse.
+
+A ``SharedProgram`` copies a program into a block of
+``multiprocessing.shared_memory`` once, padded to whole pages, and gives
+out a small, picklable ``handle`` to it.  A worker process passes the handle
+to ``attach``, which maps the block and returns an image whose pages are
+views of it, so no worker parses, or even copies, the program: each one only
+copies the pages it writes to, as any computer does.  Starting a worker
+costs the same however long the program is.
+
+Only programs whose values fit in 64 bits can be cached or shared this way;
+``load_program`` parses anything else every time, and ``SharedProgram``
+raises ``OverflowError`` for it.
+"""
+import glob
+import hashlib
+import os
+from array import array
+from multiprocessing import shared_memory
+
+from .memory import PAGE_SIZE, ProgramImage, load_image
+
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'intcode')
+
+# this process's attached programs, by shared memory name
+_attached = {}
+
+
+def parse(text):
+    """Parse a comma-separated program into an ``array('q')``."""
+    return array('q', [int(i) for i in text.split(',')])
+
+
+def _padded(values):
+    values.extend([0] * (-len(values) % PAGE_SIZE))
+    return values
+
+
+def _hash(data):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _write_cache(directory, name, cached, values):
+    os.makedirs(directory, exist_ok=True)
+    # drop caches of earlier versions of the input
+    pattern = os.path.join(directory, f'{glob.escape(name)}.*.i64')
+    for old in glob.glob(pattern):
+        os.remove(old)
+    temp = f'{cached}.{os.getpid()}'
+    with open(temp, 'wb') as f:
+        values.tofile(f)
+    os.replace(temp, cached)
+
+
+def load_program(path, cache_dir=None):
+    """
+    Return the ``ProgramImage`` of the program in the file ``path``, using
+    (or writing) its cached parse in ``cache_dir`` (``CACHE_DIR`` by
+    default).
+    """
+    with open(path, 'rb') as f:
+        text = f.read()
+    directory = CACHE_DIR if cache_dir is None else cache_dir
+    name = (f'{os.path.basename(path)}-'
+            f'{_hash(os.path.abspath(path).encode())}')
+    cached = os.path.join(directory, f'{name}.{_hash(text)}.i64')
+    values = array('q')
+    try:
+        with open(cached, 'rb') as f:
+            values.frombytes(f.read())
+    except OSError:
+        try:
+            values = parse(text.decode())
+        except OverflowError:
+            return load_image(text.decode().strip())
+        try:
+            _write_cache(directory, name, cached, values)
+        except OSError:
+            # nowhere to keep it: parse it again next time
+            pass
+    size = len(values)
+    return ProgramImage.from_buffer(_padded(values), size)
+
+
+class SharedProgram():
+    """
+    A program (a comma-separated string or a ``ProgramImage``) in shared
+    memory, for as long as this is open; ``handle`` is what ``attach`` needs
+    to get at it.  Close it (or use it as a context manager) when the
+    workers are done.
+    """
+    def __init__(self, inp):
+        image = load_image(inp)
+        values = _padded(array('q', [image[i] for i in range(len(image))]))
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=len(values) * values.itemsize)
+        self.shm.buf[:len(values) * values.itemsize] = values.tobytes()
+        self.handle = (self.shm.name, len(image), len(values))
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Mapping(shared_memory.SharedMemory):
+    def __del__(self):
+        # the pages of its image can still be in use when the process exits
+        try:
+            super().__del__()
+        except BufferError:
+            pass
+
+
+def attach(handle):
+    """
+    Return an image of the shared program ``handle`` refers to, mapping it
+    on the first call in this process.  It stays mapped until the process
+    exits.
+    """
+    name, size, padded = handle
+    if name not in _attached:
+        shm = _Mapping(name)
+        buffer = shm.buf[:padded * 8]
+        _attached[name] = (shm, ProgramImage.from_buffer(buffer, size))
+    return _attached[name][1]
@@ -0,0 +1,233 @@
+"""
+Closed-form summaries of simple counted loops.
+
+A block that ends by jumping back to its own start is a loop.  If every
+cell the loop writes either goes up by the same amount each time round
+(``i = i + 1``, ``total = total + step``...) or is simply recomputed each
+time (a comparison flag, a temporary), and the exit test works out to a
+linear function of the number of times round, the number of iterations can
+be worked out directly.  ``LoopSummary.skip`` does that when the block is
+entered: it moves the counters on by all but the last iteration in one go
+and leaves the last one for the block itself to run, so it exits the loop
+(and sets any flags and temporaries) exactly as it would have.
+
+Only loops built from add, multiply, compare and jump on position-mode or
+relative-mode cells match, and only if the relative base stays put inside
+the loop.  Anything else, or a loop that would write to code, have a
+relative cell alias a fixed one, or never finish, is left alone and runs
+normally.
+"""
+from .ir import Cell, Const, Rel, is_const
+
+# kinds a loop body can contain
+_BODY = ('add', 'mul', 'set', 'lt', 'eq', 'nop')
+
+# give up on a loop after it couldn't be skipped this many times in a row
+MAX_MISSES = 8
+
+
+class Opaque():
+    """A value that isn't affine in the cells at the start of an iteration."""
+    def __init__(self, compare=None):
+        # ('lt' or 'eq', left, right) for the result of a comparison
+        self.compare = compare
+
+
+def _add(x, y, sign=1):
+    out = dict(x)
+    for key, coef in y.items():
+        out[key] = out.get(key, 0) + sign * coef
+        if out[key] == 0 and key is not None:
+            del out[key]
+    return out
+
+
+def _scale(x, factor):
+    return {key: coef * factor for key, coef in x.items() if coef * factor
+            or key is None}
+
+
+def _constant(x):
+    """The value of an affine expression with no cells in it, or None."""
+    if all(key is None for key in x):
+        return x.get(None, 0)
+    return None
+
+
+def first_stop(test, d0, dd):
+    """
+    The first iteration ``k`` (counting from 0) at which a loop stops, when
+    it continues while ``test`` holds for ``d0 + k * dd``: 'nz' (non-zero),
+    'z' (zero), 'neg' (negative) or 'nonneg'.  None if it never stops.
+    """
+    if test == 'nz':
+        if dd == 0:
+            return 0 if d0 == 0 else None
+        k, rem = divmod(-d0, dd)
+        return k if rem == 0 and k >= 0 else None
+    if test == 'z':
+        if d0 != 0:
+            return 0
+        return 1 if dd != 0 else None
+    if test == 'neg':
+        if d0 >= 0:
+            return 0
+        return (-d0 + dd - 1) // dd if dd > 0 else None
+    if d0 < 0:
+        return 0
+    return d0 // -dd + 1 if dd < 0 else None
+
+
+def _continues(test, d):
+    return {'nz': d != 0, 'z': d == 0, 'neg': d < 0, 'nonneg': d >= 0}[test]
+
+
+class LoopSummary():
+    """
+    How to skip ahead through a loop: the cells that step by a fixed amount
+    each iteration (``steps``, cell -> affine step), and the exit test,
+    ``test`` applied to ``diff``, an affine expression in the cells at the
+    start of an iteration.
+    """
+    def __init__(self, start, length, steps, written, test, diff):
+        self.start = start
+        self.length = length
+        self.steps = steps
+        self.written = written
+        self.test = test
+        self.diff = diff
+        self.cells = {key for key in diff if key is not None}
+        for step in steps.values():
+            self.cells |= {key for key in step if key is not None}
+        self.cells |= set(written)
+        self.misses = 0
+
+    def _addr(self, loc, rb):
+        return loc.addr if isinstance(loc, Cell) else rb + loc.offset
+
+    def skip(self, vm):
+        """
+        If the loop at the current position will go round more than once,
+        run all but the last iteration in one go.  Returns the number of
+        iterations skipped.
+        """
+        if self.misses >= MAX_MISSES:
+            return 0
+        rb = vm.rel_base
+        addrs = {loc: self._addr(loc, rb) for loc in self.cells}
+        fixed = [a for loc, a in addrs.items() if isinstance(loc, Cell)]
+        moving = [a for loc, a in addrs.items() if isinstance(loc, Rel)]
+        # the loop writes memory, which a shared cache can't be trusted with
+        vm._own_cache()
+        if (set(fixed) & set(moving)
+                or any(addrs[loc] in vm._owners for loc in self.written)):
+            # a relative cell is one of the fixed ones, or the loop writes
+            # code: run it the slow way
+            self.misses += 1
+            return 0
+        mem = vm.mem
+        values = {loc: mem[a] for loc, a in addrs.items()}
+
+        def value(expr):
+            return sum(coef * (values[key] if key is not None else 1)
+                       for key, coef in expr.items())
+
+        steps = {loc: value(step) for loc, step in self.steps.items()}
+        d0 = value(self.diff)
+        dd = sum(coef * steps.get(key, 0)
+                 for key, coef in self.diff.items() if key is not None)
+        stop = first_stop(self.test, d0, dd)
+        if stop is None:
+            self.misses += 1
+            return 0
+        if stop < 1:
+            self.misses = 0
+            return 0
+        # check the closed form: still going at the skipped iterations' last
+        # test, stopping at the one after.  If it's wrong, run the loop the
+        # slow way
+        if (not _continues(self.test, d0 + (stop - 1) * dd)
+                or _continues(self.test, d0 + stop * dd)):
+            self.misses += 1
+            return 0
+        self.misses = 0
+        for loc, step in steps.items():
+            mem[addrs[loc]] = values[loc] + stop * step
+        vm.iteration += stop * self.length
+        return stop
+
+
+def summarize(ops, start):
+    """
+    Return a ``LoopSummary`` for the traced block ``ops`` starting at
+    ``start``, or None if it isn't a loop of the kind that can be skipped.
+    """
+    last = ops[-1]
+    if (last.kind not in ('jnz', 'jz') or not is_const(last.args[1], start)
+            or any(op.kind not in _BODY for op in ops[:-1])):
+        return None
+    env = {}
+    read_first = set()
+
+    def read(arg):
+        if isinstance(arg, Const):
+            return {None: arg.value}
+        if arg in env:
+            return env[arg]
+        read_first.add(arg)
+        return {arg: 1}
+
+    for op in ops[:-1]:
+        if op.kind == 'nop':
+            continue
+        args = [read(arg) for arg in op.args]
+        if any(isinstance(a, Opaque) for a in args):
+            result = Opaque()
+        elif op.kind == 'set':
+            result = args[0]
+        elif op.kind == 'add':
+            result = _add(*args)
+        elif op.kind == 'mul':
+            x, y = args
+            if _constant(x) is not None:
+                result = _scale(y, _constant(x))
+            elif _constant(y) is not None:
+                result = _scale(x, _constant(y))
+            else:
+                result = Opaque()
+        else:
+            result = Opaque((op.kind, *args))
+        env[op.dest] = result
+
+    steps = {}
+    for loc, result in env.items():
+        if isinstance(result, Opaque) or loc not in result:
+            # recomputed each time: fine, as long as it isn't used before
+            # it's set
+            if loc in read_first:
+                return None
+            continue
+        step = _add(result, {loc: 1}, -1)
+        if any(key in env for key in step):
+            # steps by an amount that itself changes
+            return None
+        steps[loc] = step
+
+    flag = read(last.args[0])
+    if isinstance(flag, Opaque):
+        if flag.compare is None:
+            return None
+        kind, x, y = flag.compare
+        if isinstance(x, Opaque) or isinstance(y, Opaque):
+            return None
+        diff = _add(x, y, -1)
+        if kind == 'lt':
+            test = 'neg' if last.kind == 'jnz' else 'nonneg'
+        else:
+            test = 'z' if last.kind == 'jnz' else 'nz'
+    else:
+        diff = flag
+        test = 'nz' if last.kind == 'jnz' else 'z'
+    if any(key in env and key not in steps for key in diff):
+        return None
+    return LoopSummary(start, len(ops), steps, list(env), test, diff)
@@ -0,0 +1,254 @@
+"""
+Memoization of Intcode subroutine calls.
+
+Intcode programs call a subroutine by storing the return position at
+``[rb+0]``, the arguments just above it, and jumping; the subroutine moves
+the relative base up past them, works in that frame, moves it back down and
+jumps to ``[rb+0]``.  So a jump taken while ``[rb+0]`` holds the position
+right after the jump is treated as a call to the jump's target, and the call
+is over when the program gets back to that position with the relative base
+where it was.
+
+While a call runs, every cell it reads before writing is logged, and so is
+the last value it wrote to each cell.  Running is deterministic, so the next
+time the same subroutine is called with those cells holding the same values,
+it will do exactly the same thing: the logged writes are made and the
+program carries on from the return position without running the call.
+Cells reached through the relative base are logged relative to the base at
+the call, so one entry covers calls made from anywhere on the stack.
+
+Writes outside the subroutine's frame (puzzle programs keep comparison
+results in a fixed scratch cell, for one) are simply made again, but a call
+is only kept if it is safe to replay: it mustn't input or output, and no
+cell may be reached both through a fixed address and through the relative
+base, since called from somewhere else on the stack the two would be
+different cells.  The second rule is checked again for the relative base of
+each later call.  A subroutine whose call breaks them isn't memoized again.
+Writing to code clears everything, since the logs don't cover the
+instructions that were run.
+"""
+from .computer import HALTED, NEEDS_INPUT, decode
+
+# a subroutine gets at most this many different sets of cells read
+MAX_SIGNATURES = 16
+
+# calls nested deeper than this are given up on (probably not calls at all)
+MAX_DEPTH = 10000
+
+
+def aliased(keys, rel_base):
+    """
+    Whether any cell among ``keys`` ((mode, position) pairs, as logged) is
+    reached both through a fixed address and through the relative base.
+    """
+    fixed = {pos for mode, pos in keys if not mode}
+    return any(rel_base + pos in fixed for mode, pos in keys if mode)
+
+
+class _Call():
+    """A call being run (and logged)."""
+    __slots__ = ('target', 'rel_base', 'ret', 'start', 'reads', 'writes')
+
+    def __init__(self, target, rel_base, ret, start):
+        self.target = target
+        self.rel_base = rel_base
+        self.ret = ret
+        self.start = start
+        # (mode, position) -> value; relative-mode positions are offsets
+        # from the relative base at the call
+        self.reads = {}
+        self.writes = {}
+
+    def read(self, key, value):
+        if key not in self.writes and key not in self.reads:
+            self.reads[key] = value
+
+    def write(self, key, value):
+        self.writes[key] = value
+
+    def merge(self, reads, writes, rel_base):
+        """Log the reads and writes of a call made from this one."""
+        shift = rel_base - self.rel_base
+        for (mode, pos), value in reads:
+            self.read((mode, pos + shift if mode else pos), value)
+        for (mode, pos), value in writes:
+            self.write((mode, pos + shift if mode else pos), value)
+
+
+class CallMemo():
+    """
+    The memo for one computer, and the interpreter that fills and uses it.
+    ``hits`` counts the calls skipped, ``calls`` those run.
+    """
+    def __init__(self):
+        # target -> {read positions: {values read: (writes, instructions)}}
+        self.tables = {}
+        self.impure = set()
+        self.stack = []
+        # position -> decoded instruction, and the cells they came from
+        self.decoded = {}
+        self.code = set()
+        self.hits = 0
+        self.calls = 0
+
+    def clear(self):
+        """Forget everything, after the code has changed."""
+        self.tables.clear()
+        self.decoded.clear()
+        self.code.clear()
+        self.stack.clear()
+
+    def _decode(self, mem, pc):
+        opcode, modes, params = decode(mem, pc)
+        nxt = pc + len(params) + 1
+        self.decoded[pc] = (opcode, modes, params, nxt)
+        self.code.update(range(pc, nxt))
+        return self.decoded[pc]
+
+    def _lookup(self, mem, target, rel_base):
+        """Return the logged outcome of calling ``target`` now, if any."""
+        for positions, outcomes in self.tables.get(target, {}).items():
+            values = tuple(mem[rel_base + pos] if mode else mem[pos]
+                           for mode, pos in positions)
+            outcome = outcomes.get(values)
+            if outcome is not None:
+                writes = outcome[0]
+                if not aliased(positions + tuple(k for k, _ in writes),
+                               rel_base):
+                    return positions, values, outcome
+        return None
+
+    def _finish(self, call, count):
+        """Keep the log of a call that has just returned."""
+        if call.target in self.impure:
+            return
+        if aliased(tuple(call.reads) + tuple(call.writes), call.rel_base):
+            self.impure.add(call.target)
+            return
+        table = self.tables.setdefault(call.target, {})
+        positions = tuple(call.reads)
+        if positions in table or len(table) < MAX_SIGNATURES:
+            table.setdefault(positions, {})[tuple(call.reads.values())] = (
+                tuple(call.writes.items()), count)
+
+    def _abandon(self):
+        """Stop logging every call in progress (none of them are kept)."""
+        for call in self.stack:
+            self.impure.add(call.target)
+        self.stack.clear()
+
+    def run(self, vm):
+        """
+        Run ``vm`` until it halts or needs input, the same as
+        ``Computer._run`` but memoizing calls.
+        """
+        mem = vm.mem
+        pc = vm.pos
+        rb = vm.rel_base
+        count = vm.iteration
+        stack = self.stack
+        decoded = self.decoded
+
+        def read(mode, p):
+            if mode == 1:
+                return p
+            addr = p if mode == 0 else rb + p
+            value = mem[addr]
+            if stack:
+                call = stack[-1]
+                call.read((0, addr) if mode == 0
+                          else (2, addr - call.rel_base), value)
+            return value
+
+        def write(mode, p, value):
+            # (writing to code clears the memo, through Computer._written)
+            addr = p if mode != 2 else rb + p
+            mem[addr] = value
+            if stack:
+                call = stack[-1]
+                call.write((0, addr) if mode != 2
+                           else (2, addr - call.rel_base), value)
+
+        try:
+            while True:
+                while stack and pc == stack[-1].ret and rb == stack[-1].rel_base:
+                    call = stack.pop()
+                    self._finish(call, count - call.start)
+                    if stack:
+                        stack[-1].merge(call.reads.items(),
+                                        call.writes.items(), call.rel_base)
+                try:
+                    opcode, modes, params, nxt = decoded[pc]
+                except KeyError:
+                    opcode, modes, params, nxt = self._decode(mem, pc)
+
+                if opcode in (1, 2, 7, 8):
+                    x = read(modes[0], params[0])
+                    y = read(modes[1], params[1])
+                    if opcode == 1:
+                        value = x + y
+                    elif opcode == 2:
+                        value = x * y
+                    elif opcode == 7:
+                        value = 1 if x < y else 0
+                    else:
+                        value = 1 if x == y else 0
+                    write(modes[2], params[2], value)
+                elif opcode in (5, 6):
+                    test = read(modes[0], params[0])
+                    target = read(modes[1], params[1])
+                    if (test != 0) == (opcode == 5):
+                        count += 1
+                        pc = target
+                        if mem[rb] == nxt:
+                            pc, count = self._call(vm, target, rb, nxt, count)
+                        continue
+                elif opcode == 9:
+                    rb += read(modes[0], params[0])
+                    if stack and rb < stack[-1].rel_base:
+                        # left the frame without returning: not a call
+                        self._abandon()
+                elif opcode in (3, 4):
+                    if stack:
+                        self._abandon()
+                    if opcode == 4:
+                        vm._write_output(read(modes[0], params[0]), pc)
+                    else:
+                        value = vm._read_input()
+                        if value is None:
+                            return NEEDS_INPUT
+                        write(modes[0], params[0], value)
+                else:
+                    self._abandon()
+                    return HALTED
+                pc = nxt
+                count += 1
+        finally:
+            vm.pos = pc
+            vm.rel_base = rb
+            vm.iteration = count
+
+    def _call(self, vm, target, rb, ret, count):
+        """
+        Enter a call to ``target``: skip it if the memo has it, or start
+        logging it.  Returns the position and instruction count to carry on
+        from.
+        """
+        stack = self.stack
+        if target in self.impure:
+            return target, count
+        found = self._lookup(vm.mem, target, rb)
+        if found is None:
+            if len(stack) >= MAX_DEPTH:
+                self._abandon()
+            else:
+                stack.append(_Call(target, rb, ret, count))
+                self.calls += 1
+            return target, count
+        positions, values, (writes, instructions) = found
+        for (mode, pos), value in writes:
+            vm.mem[rb + pos if mode else pos] = value
+        if stack:
+            stack[-1].merge(zip(positions, values), writes, rb)
+        self.hits += 1
+        return ret, count + instructions
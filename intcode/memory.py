@@ -0,0 +1,259 @@
+"""
+Paged, copy-on-write memory for the Intcode computer.
+
+Memory is a list of fixed-size ``array('q')`` pages.  A program is parsed once
+into a ``ProgramImage`` whose pages are read-only, and every computer started
+from the same program shares them; a page is only copied the first time a
+computer writes to it.  Pages that have never been written all point at one
+shared page of zeros, so a computer costs a page table rather than a copy of
+its whole address space.
+
+Read-only pages are memoryviews (or tuples, for a page holding a value too big
+for 64 bits), so writing to one raises ``TypeError``; a private page that is
+asked to hold a value too big for 64 bits raises ``OverflowError``.  The
+computer catches those, calls ``PagedMemory.fault`` to copy, grow or widen the
+page, and retries the instruction.
+"""
+import hashlib
+from array import array
+from functools import lru_cache
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+# addresses past this are treated as a runaway program rather than grown into
+MAX_ADDRESS = 1 << 32
+
+
+def freeze(values):
+    """Return a read-only page holding ``values``."""
+    try:
+        return memoryview(array('q', values)).toreadonly()
+    except OverflowError:
+        return tuple(values)
+
+
+def thaw(page):
+    """Return a private, writable copy of ``page``."""
+    if isinstance(page, memoryview):
+        # (not page.obj[:]: the page may be a slice of a bigger buffer)
+        private = array('q')
+        private.frombytes(page.cast('B'))
+        return private
+    return list(page)
+
+
+ZERO_PAGE = freeze([0] * PAGE_SIZE)
+
+
+def share(page):
+    """Return a read-only view of a private page, without copying an array."""
+    if isinstance(page, list):
+        return tuple(page)
+    return memoryview(page).toreadonly()
+
+
+def is_private(page):
+    return not isinstance(page, (memoryview, tuple))
+
+
+class ProgramImage():
+    """
+    A parsed program, split into shared read-only pages.  It also holds the
+    steps and compiled blocks decoded from the unmodified program (filled in
+    by the computers running it), so a new or reset computer doesn't have to
+    decode them again.
+
+    A program whose values all fit in 64 bits is kept in one contiguous int64
+    ``buffer`` (padded to whole pages), which the pages are views of, so it
+    can be handed to NumPy or shared memory as it is.  For any other program
+    ``buffer`` is None and the pages hold Python ints.
+    """
+    def __init__(self, program, buffer=None):
+        self.size = len(program)
+        if buffer is None:
+            padded = list(program) + [0] * (-len(program) % PAGE_SIZE)
+            try:
+                buffer = memoryview(array('q', padded)).toreadonly()
+            except OverflowError:
+                pages = tuple(tuple(padded[i:i + PAGE_SIZE])
+                              for i in range(0, len(padded), PAGE_SIZE))
+        if buffer is not None:
+            pages = tuple(buffer[i:i + PAGE_SIZE]
+                          for i in range(0, len(buffer), PAGE_SIZE))
+        self.buffer = buffer
+        self.pages = pages
+        self.decoded = {}
+        self.blocks = {}
+        self.owners = {}
+        # block start -> times run by the interpreter before being compiled
+        self.heat = {}
+        # cells of code that a running program has written to
+        self.rewritten = set()
+        self._digest = None
+
+    @classmethod
+    def from_buffer(cls, buffer, size):
+        """
+        An image of the ``size`` int64 values in ``buffer``, padded with zeros
+        to a whole number of pages, whose pages are views of ``buffer`` rather
+        than copies of it.
+        """
+        view = memoryview(buffer).cast('B').cast('q').toreadonly()
+        if len(view) % PAGE_SIZE:
+            raise ValueError('the buffer is not a whole number of pages')
+        return cls(range(size), view)
+
+    @property
+    def digest(self):
+        """A hash of the program, to tell whether a saved state is for it."""
+        if self._digest is None:
+            h = hashlib.blake2b(self.size.to_bytes(8, 'little'),
+                                digest_size=16)
+            for page in self.pages:
+                if isinstance(page, memoryview):
+                    h.update(page)
+                else:
+                    h.update(repr(page).encode())
+            self._digest = h.digest()
+        return self._digest
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, addr):
+        try:
+            return self.pages[addr >> PAGE_BITS][addr & PAGE_MASK]
+        except IndexError:
+            return 0
+
+
+def load_image(inp):
+    """
+    Parse a comma-separated program, reusing the image for repeat calls.
+    ``inp`` may also be an image already (e.g. from ``intcode.loader``).
+    """
+    if isinstance(inp, ProgramImage):
+        return inp
+    return _parse_image(inp)
+
+
+@lru_cache(maxsize=32)
+def _parse_image(inp):
+    return ProgramImage([int(i) for i in inp.split(',')])
+
+
+class PagedMemory():
+    """
+    The memory of one computer: a page table over a shared ``ProgramImage``.
+    Supports ``mem[addr]``, ``mem[addr] = value`` and slicing like the plain
+    list it replaces; cells that were never written read as zero.
+    ``on_write``, if set, is called with the address of each ``mem[addr] =``
+    write (but not of writes a running program makes through ``pages``).
+    """
+    def __init__(self, image):
+        self.image = image
+        self.pages = list(image.pages)
+        # indices of pages that may differ from the image
+        self.dirty = set()
+        self.on_write = None
+
+    def __len__(self):
+        return len(self.pages) * PAGE_SIZE
+
+    def _check(self, addr):
+        if not 0 <= addr < MAX_ADDRESS:
+            raise IndexError(f'Intcode address {addr} is out of range')
+
+    def grow(self, addr):
+        """Make sure the page table reaches ``addr``."""
+        self._check(addr)
+        missing = (addr >> PAGE_BITS) + 1 - len(self.pages)
+        if missing > 0:
+            self.pages.extend([ZERO_PAGE] * missing)
+            return True
+        return False
+
+    def writable(self, addr):
+        """Return the page holding ``addr``, copying it first if it's shared."""
+        self.grow(addr)
+        page = self.pages[addr >> PAGE_BITS]
+        if not is_private(page):
+            page = self.pages[addr >> PAGE_BITS] = thaw(page)
+            self.dirty.add(addr >> PAGE_BITS)
+        return page
+
+    def widen(self, addr):
+        """Switch the page holding ``addr`` to Python ints."""
+        page = self.writable(addr)
+        if isinstance(page, list):
+            return False
+        self.pages[addr >> PAGE_BITS] = page.tolist()
+        return True
+
+    def fault(self, reads, writes, overflow=False):
+        """
+        Prepare the pages an instruction touches after it raised: grow the
+        table for ``reads``, copy the pages of ``writes``, and widen them too
+        if the write overflowed.  Returns ``False`` if nothing needed fixing,
+        meaning the error came from somewhere else.
+        """
+        changed = False
+        for addr in reads:
+            changed |= self.grow(addr)
+        for addr in writes:
+            changed |= self.grow(addr)
+            if not is_private(self.pages[addr >> PAGE_BITS]):
+                self.writable(addr)
+                changed = True
+            if overflow:
+                changed |= self.widen(addr)
+        return changed
+
+    def fork(self):
+        """
+        Return a copy of this memory.  Pages this memory had made private are
+        turned back into shared read-only pages, so the two copies share
+        every page until one of them writes to it.
+        """
+        pages = self.pages
+        for i, page in enumerate(pages):
+            if is_private(page):
+                pages[i] = share(page)
+        other = PagedMemory(self.image)
+        other.pages = list(pages)
+        other.dirty = set(self.dirty)
+        return other
+
+    def reset(self):
+        """Go back to the program image, reverting only the pages written to."""
+        image_pages = self.image.pages
+        del self.pages[len(image_pages):]
+        for i in self.dirty:
+            if i < len(image_pages):
+                self.pages[i] = image_pages[i]
+        self.dirty = set()
+
+    def __getitem__(self, addr):
+        if isinstance(addr, slice):
+            return [self[i] for i in range(*addr.indices(len(self)))]
+        self._check(addr)
+        try:
+            return self.pages[addr >> PAGE_BITS][addr & PAGE_MASK]
+        except IndexError:
+            return 0
+
+    def __setitem__(self, addr, value):
+        page = self.writable(addr)
+        try:
+            page[addr & PAGE_MASK] = value
+        except OverflowError:
+            self.widen(addr)
+            self.pages[addr >> PAGE_BITS][addr & PAGE_MASK] = value
+        if self.on_write is not None:
+            self.on_write(addr)
+
+    def tolist(self):
+        """Return the memory as a plain list, up to the last page in use."""
+        return [value for page in self.pages for value in page]
@@ -0,0 +1,172 @@
+"""
+The day 23 network: NICs (one Intcode computer each) sending each other
+packets, with a NAT at address 255 that restarts the network when it goes
+idle.
+
+Rather than going round every NIC in turn, feeding ``-1`` to the ones with
+nothing to do, ``Network`` keeps a queue of the NICs worth running: one is
+run when it has packets waiting, or until it has asked for input and found
+none twice in a row without sending anything, at which point it counts as
+idle and is left alone until a packet arrives for it.  Each NIC's packets
+wait in a deque and are all handed over at once when it runs, and the
+packets it sends come framed from its ``frames`` (see ``intcode.framing``),
+which keeps nothing once they are delivered.  A count of
+idle NICs means the network is known to be idle the moment the last one
+goes quiet, which is when the NAT sends its packet to address 0.
+
+For bigger, synthetic networks, ``copies`` runs that many copies of the
+network side by side, NIC ``g`` being NIC ``g % n`` of copy ``g // n``, each
+copy with its own NAT (woken together when everything is idle).  A
+``Network`` can also be given just some of the NICs (``nodes``), as
+``intcode.sharded`` does for each process; packets for the others are put
+in ``remote`` for whoever runs them.
+"""
+from collections import deque
+
+from .computer import Computer
+
+NAT = 255
+
+# a NIC that has polled for input this many times in a row without getting
+# or sending anything is idle
+IDLE_POLLS = 2
+
+
+class Network():
+    """
+    ``n`` NICs running the program ``inp`` (built by ``computer``, e.g.
+    ``functools.partial(Computer, compiled=True)``), booted with their
+    addresses, times ``copies``; or just the ones in ``nodes``.
+    ``packets`` counts the packets delivered, including the NATs'.
+    """
+    def __init__(self, inp, n=50, computer=Computer, copies=1, nodes=None):
+        self.n = n
+        if nodes is None:
+            nodes = range(n * copies)
+        self.nics = {g: computer(f'{g}', inp, frames=3) for g in nodes}
+        self.queues = {g: deque() for g in nodes}
+        self.polls = dict.fromkeys(nodes, 0)
+        self.idle = 0
+        self.is_idle = dict.fromkeys(nodes, False)
+        self.ready = deque()
+        # each copy's last packet to its NAT, and the NAT packets sent since
+        # ``nat_log`` was last emptied, as (copy, x, y)
+        self.nats = [None] * copies
+        self.nat_log = []
+        self.first_nat = None
+        # packets for NICs this network doesn't run, as (g, x, y)
+        self.remote = []
+        self.packets = 0
+        for g, nic in self.nics.items():
+            nic.run_intcode(g % n)
+            self._send(g, nic)
+            self.ready.append(g)
+
+    @property
+    def nat(self):
+        """The last packet sent to the (first copy's) NAT."""
+        return self.nats[0]
+
+    def _send(self, g, nic):
+        """Deliver the packets NIC ``g`` has finished sending."""
+        base = g - g % self.n
+        for to, x, y in nic.frames.take():
+            if to == NAT:
+                copy = g // self.n
+                self.nats[copy] = (x, y)
+                self.nat_log.append((copy, x, y))
+                if self.first_nat is None:
+                    self.first_nat = (x, y)
+            else:
+                self.deliver(base + to, x, y)
+
+    def deliver(self, to, x, y):
+        """Queue a packet for NIC ``to``, waking it if it's idle."""
+        queue = self.queues.get(to)
+        if queue is None:
+            self.remote.append((to, x, y))
+            return
+        queue.extend((x, y))
+        self.packets += 1
+        if self.is_idle[to]:
+            self.is_idle[to] = False
+            self.idle -= 1
+            self.polls[to] = 0
+            self.ready.append(to)
+
+    def step(self):
+        """
+        Run the next NIC that has something to do, until it needs input.
+        Returns ``False`` if every NIC is idle.
+        """
+        if not self.ready:
+            return False
+        g = self.ready.popleft()
+        nic, queue = self.nics[g], self.queues[g]
+        sent = nic.output_count
+        if queue:
+            nic.input_stack += queue
+            queue.clear()
+            self.polls[g] = 0
+            nic.run_intcode()
+        else:
+            nic.run_intcode(-1)
+            self.polls[g] += 1
+        if nic.output_count != sent:
+            self.polls[g] = 0
+            self._send(g, nic)
+        if queue or self.polls[g] < IDLE_POLLS:
+            self.ready.append(g)
+        else:
+            self.is_idle[g] = True
+            self.idle += 1
+        return True
+
+    def run_until_idle(self):
+        """Run NICs until every one of them is idle."""
+        while self.step():
+            pass
+        assert self.idle == len(self.nics)
+
+    def wake(self):
+        """
+        Have each NAT send its last packet to its copy's address 0, as they
+        do when the network is idle.  Returns the first copy's packet.
+        """
+        if None in self.nats:
+            raise RuntimeError('the network is idle, but a NAT has no '
+                               'packet to send')
+        for copy, (x, y) in enumerate(self.nats):
+            self.deliver(copy * self.n, x, y)
+        return self.nat
+
+    def run_until_nat(self):
+        """Run until a packet is sent to the NAT, and return it."""
+        while self.first_nat is None:
+            if not self.step():
+                raise RuntimeError('the network went idle before sending '
+                                   'anything to the NAT')
+        return self.first_nat
+
+    def run_until_repeat(self):
+        """
+        Run, waking the network up each time it goes idle, until the NAT
+        sends address 0 the same Y value twice in a row.  Returns that
+        packet.
+        """
+        last_y = None
+        while True:
+            self.run_until_idle()
+            x, y = self.wake()
+            if y == last_y:
+                return x, y
+            last_y = y
+
+    def close(self):
+        """Nothing to release; as ``ShardedNetwork.close``."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
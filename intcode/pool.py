@@ -0,0 +1,52 @@
+"""
+Pools of computers for running the same program over and over.
+
+Days 19 and 21 run one program for many separate queries.  Rather than build
+a new ``Computer`` for each, a ``ComputerPool`` hands out a computer that has
+been ``reset``, which only reverts the pages the last query wrote to and keeps
+the decoded instructions, so a query costs about as much as the instructions
+it runs.
+"""
+from contextlib import contextmanager
+
+from .computer import Computer
+
+# this process's pools, by program
+_pools = {}
+
+
+class ComputerPool():
+    def __init__(self, inp, name='pooled'):
+        self.inp = inp
+        self.name = name
+        self._idle = []
+
+    @classmethod
+    def for_program(cls, inp):
+        """
+        Return this process's pool for ``inp``, creating it on first use, so
+        each ``multiprocessing`` worker keeps its computers between tasks.
+        """
+        if inp not in _pools:
+            _pools[inp] = cls(inp)
+        return _pools[inp]
+
+    @contextmanager
+    def computer(self):
+        """Lend out a freshly reset computer; it's reset again on return."""
+        if self._idle:
+            c = self._idle.pop()
+        else:
+            c = Computer(self.name, self.inp)
+        try:
+            yield c
+        finally:
+            c.reset()
+            self._idle.append(c)
+
+    def query(self, inputs):
+        """Run the program with ``inputs`` and return all of its outputs."""
+        with self.computer() as c:
+            c.input_stack = list(inputs)
+            c.run_intcode()
+            return c.total_output
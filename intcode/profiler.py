@@ -0,0 +1,356 @@
+"""
+Where an Intcode program spends its time.
+
+A ``Computer`` built with ``profile=True`` runs through ``Profiler.run``, an
+interpreter loop like ``Computer._run`` that also counts every instruction
+it executes, by instruction word (so by opcode and parameter modes) and by
+address, and times each basic block: the straight run of instructions from
+where the program jumped to (or was resumed at) up to and including the next
+jump.  Blocks are timed as a whole, with one clock read per block; the
+times include the counting, so they are for comparing blocks with each
+other rather than with a run that isn't profiled.
+
+Without ``profile`` none of this is involved (the computer's run loops have
+no profiling code in them), so it costs nothing when it's off.  While it's
+on, the computer interprets one instruction at a time even if ``compiled``
+or ``memoize`` is set, so every instruction is seen.
+
+``report`` gives the instruction mix and the hottest addresses and blocks,
+and ``annotate`` a disassembly of every instruction that ran, with its count
+and, at the start of each block, the block's time.  From the repository
+root, ``python -m intcode.profiler 09 2`` prints both for day 09's program run
+with the input 2; arguments that aren't numbers are sent as lines of ASCII
+(``python -m intcode.profiler 25 east south inv``).
+
+A ``CallGraph`` (``Computer(..., profile=CallGraph())``, or ``--calls``)
+profiles by subroutine instead.  Calls are found the way ``intcode.memo``
+finds them: a jump taken while ``[rb+0]`` holds the position right after it
+is a call to the jump's target, which returns when the program jumps back to
+that position with the relative base where it was; if the relative base
+drops below a call's before then, the call is taken to be over.  Every
+instruction is counted against the stack of calls it ran in, which gives the
+call tree, inclusive and exclusive counts for each subroutine, and the
+collapsed stacks (``main;sub_1150;sub_1174 3264`` lines) that flame graph
+tools read.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+
+from .computer import MNEMONICS, NPARAMS, disassemble, split_word
+from .memory import PAGE_BITS, PAGE_MASK
+
+
+class Profiler():
+    """
+    Counts and times for the instructions run by a computer (or several:
+    one profiler can be handed to any number of them).  ``ops`` counts
+    instruction words, ``hits`` addresses; ``block_time`` (in nanoseconds),
+    ``block_runs`` and ``block_instrs`` are by the address a block starts at.
+    """
+    def __init__(self):
+        self.ops = Counter()
+        self.hits = Counter()
+        self.block_time = Counter()
+        self.block_runs = Counter()
+        self.block_instrs = Counter()
+        # the memory of the computer last profiled, for disassembly
+        self.mem = None
+
+    @property
+    def instructions(self):
+        return sum(self.hits.values())
+
+    def run(self, vm):
+        """Run ``vm`` as ``Computer._run`` does, counting as it goes."""
+        self.mem = vm.mem
+        ops, hits = self.ops, self.hits
+        clock = time.perf_counter_ns
+        pages = vm.mem.pages
+        pc = start = vm.pos
+        count = in_block = 0
+        began = clock()
+        try:
+            while True:
+                try:
+                    step = vm._decoded[pc]
+                except KeyError:
+                    step = vm._decode(pc)
+                word = pages[pc >> PAGE_BITS][pc & PAGE_MASK]
+                nxt = step(vm, pages)
+                if nxt < 0:
+                    return nxt
+                # counted once it has run, as a step that faults is retried
+                ops[word] += 1
+                hits[pc] += 1
+                count += 1
+                in_block += 1
+                if word % 100 in (5, 6):
+                    now = clock()
+                    self.block_time[start] += now - began
+                    self.block_runs[start] += 1
+                    self.block_instrs[start] += in_block
+                    start, began, in_block = nxt, now, 0
+                pc = nxt
+        finally:
+            # a block cut short by a halt, input or fault: its time and
+            # instructions count, but not as a run
+            self.block_time[start] += clock() - began
+            self.block_instrs[start] += in_block
+            vm.pos = pc
+            vm.iteration += count
+
+    def by_opcode(self):
+        """Instruction counts by (opcode, modes)."""
+        counts = Counter()
+        for word, n in self.ops.items():
+            counts[split_word(word)] += n
+        return counts
+
+    def _describe(self, pc):
+        try:
+            return disassemble(self.mem, pc)
+        except (ValueError, KeyError):
+            return f'{self.mem[pc]} (not an instruction now)'
+
+    def report(self, top=10):
+        """The instruction mix, and the ``top`` hottest addresses and blocks."""
+        total = self.instructions or 1
+        lines = [f'{self.instructions:,} instructions',
+                 '',
+                 f'{"opcode":<16}{"modes":<8}{"count":>14}{"share":>8}']
+        for (opcode, modes), n in self.by_opcode().most_common():
+            name = MNEMONICS.get(opcode, str(opcode))
+            lines.append(f'{name:<16}{"".join(map(str, modes)) or "-":<8}'
+                         f'{n:>14,}{n / total:>8.1%}')
+        lines += ['', f'{"address":>8}{"count":>14}{"share":>8}  instruction']
+        for pc, n in self.hits.most_common(top):
+            lines.append(f'{pc:>8}{n:>14,}{n / total:>8.1%}  '
+                         f'{self._describe(pc)}')
+        time_total = sum(self.block_time.values()) or 1
+        lines += ['', f'{"block":>8}{"runs":>12}{"instrs":>14}{"time":>12}'
+                      f'{"share":>8}{"per run":>12}']
+        for pc, ns in self.block_time.most_common(top):
+            runs = self.block_runs[pc]
+            per_run = f'{ns / runs / 1e3:,.2f}us' if runs else '-'
+            lines.append(f'{pc:>8}{runs:>12,}{self.block_instrs[pc]:>14,}'
+                         f'{ns / 1e6:>10,.2f}ms{ns / time_total:>8.1%}'
+                         f'{per_run:>12}')
+        return '\n'.join(lines)
+
+    def annotate(self):
+        """
+        A disassembly of the addresses that ran, in order, with their counts,
+        the time of each block at its first address, and the stretches in
+        between (data, or code that never ran) left out.
+        """
+        lines = [f'{"address":>8}{"count":>14}{"block time":>14}  instruction']
+        last = None
+        for pc in sorted(self.hits):
+            if last is not None and pc > last:
+                lines.append(f'{"":>8}  ... {pc - last} cells not run')
+            block = (f'{self.block_time[pc] / 1e6:,.3f}ms'
+                     if pc in self.block_time else '')
+            lines.append(f'{pc:>8}{self.hits[pc]:>14,}{block:>14}  '
+                         f'{self._describe(pc)}')
+            try:
+                opcode = self.mem[pc] % 100
+                last = pc + 1 + NPARAMS.get(opcode, 0)
+            except IndexError:
+                last = pc + 1
+        return '\n'.join(lines)
+
+
+def frame_name(target):
+    """The name a subroutine (or, for ``None``, the top level) goes by."""
+    return 'main' if target is None else f'sub_{target}'
+
+
+class CallGraph():
+    """
+    Instruction counts by call stack.  ``stacks`` maps each stack (a tuple
+    of subroutine addresses, outermost first) to the instructions run with
+    it on top, and ``calls`` counts the calls to each subroutine.
+    """
+    def __init__(self):
+        self.stacks = Counter()
+        self.calls = Counter()
+        # the calls in progress, and (relative base, return position) for each
+        self.path = ()
+        self.frames = []
+        self.mem = None
+
+    @property
+    def instructions(self):
+        return sum(self.stacks.values())
+
+    def run(self, vm):
+        """Run ``vm`` as ``Computer._run`` does, following its calls."""
+        self.mem = mem = vm.mem
+        pages = mem.pages
+        frames = self.frames
+        pc = vm.pos
+        count = mark = 0
+        try:
+            while True:
+                try:
+                    step = vm._decoded[pc]
+                except KeyError:
+                    step = vm._decode(pc)
+                word = pages[pc >> PAGE_BITS][pc & PAGE_MASK]
+                opcode = word % 100
+                taken = False
+                if opcode in (5, 6):
+                    # taken or not by its test value, not by where it lands
+                    # (a jump can land where falling through would)
+                    p = mem[pc + 1]
+                    mode = word // 100 % 10
+                    test = p if mode == 1 else mem[
+                        p + vm.rel_base if mode == 2 else p]
+                    taken = (test != 0) == (opcode == 5)
+                nxt = step(vm, pages)
+                if nxt < 0:
+                    return nxt
+                count += 1
+                if opcode == 9:
+                    if frames and vm.rel_base < frames[-1][0]:
+                        self.stacks[self.path] += count - mark
+                        mark = count
+                        while frames and vm.rel_base < frames[-1][0]:
+                            self._leave()
+                elif taken:
+                    ret = pc + 3
+                    if frames and frames[-1] == (vm.rel_base, nxt):
+                        self.stacks[self.path] += count - mark
+                        mark = count
+                        self._leave()
+                    elif mem[vm.rel_base] == ret:
+                        self.stacks[self.path] += count - mark
+                        mark = count
+                        frames.append((vm.rel_base, ret))
+                        self.path += (nxt,)
+                        self.calls[nxt] += 1
+                pc = nxt
+        finally:
+            self.stacks[self.path] += count - mark
+            vm.pos = pc
+            vm.iteration += count
+
+    def _leave(self):
+        self.frames.pop()
+        self.path = self.path[:-1]
+
+    def functions(self):
+        """
+        Return {subroutine: (calls, inclusive, exclusive)} instruction
+        counts, ``None`` being the top level.  A recursive subroutine's
+        inclusive count has each instruction once, however deep.
+        """
+        inclusive = Counter()
+        exclusive = Counter()
+        for path, n in self.stacks.items():
+            exclusive[path[-1] if path else None] += n
+            inclusive[None] += n
+            for target in set(path):
+                inclusive[target] += n
+        return {target: (self.calls[target], n, exclusive[target])
+                for target, n in inclusive.items()}
+
+    def report(self, top=10):
+        """The ``top`` subroutines by inclusive count."""
+        total = self.instructions or 1
+        lines = [f'{self.instructions:,} instructions, '
+                 f'{sum(self.calls.values()):,} calls',
+                 '',
+                 f'{"subroutine":<12}{"calls":>10}{"inclusive":>14}'
+                 f'{"share":>8}{"exclusive":>14}{"share":>8}{"per call":>12}']
+        functions = sorted(self.functions().items(),
+                           key=lambda item: -item[1][1])
+        for target, (calls, inclusive, exclusive) in functions[:top]:
+            per_call = f'{inclusive / calls:,.1f}' if calls else '-'
+            lines.append(f'{frame_name(target):<12}{calls:>10,}'
+                         f'{inclusive:>14,}{inclusive / total:>8.1%}'
+                         f'{exclusive:>14,}{exclusive / total:>8.1%}'
+                         f'{per_call:>12}')
+        return '\n'.join(lines)
+
+    def tree(self, threshold=0.01):
+        """
+        The call tree, one line per stack, with inclusive and exclusive
+        counts; stacks with less than ``threshold`` of the instructions are
+        left out.
+        """
+        inclusive = Counter()
+        children = {}
+        for path, n in self.stacks.items():
+            for i in range(len(path) + 1):
+                inclusive[path[:i]] += n
+                if i:
+                    children.setdefault(path[:i - 1], set()).add(path[:i])
+        total = self.instructions or 1
+        lines = []
+
+        def walk(path):
+            name = frame_name(path[-1] if path else None)
+            lines.append(f'{"  " * len(path)}{name}  {inclusive[path]:,} '
+                         f'({inclusive[path] / total:.1%}), '
+                         f'{self.stacks[path]:,} in itself')
+            for child in sorted(children.get(path, ()),
+                                key=lambda p: -inclusive[p]):
+                if inclusive[child] >= threshold * total:
+                    walk(child)
+
+        walk(())
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        """The stacks in collapsed-stack format, for flame graphs."""
+        return '\n'.join(
+            ';'.join(['main'] + [frame_name(t) for t in path]) + f' {n}'
+            for path, n in sorted(self.stacks.items()) if n)
+
+
+def main():
+    from .computer import Computer
+    from .loader import load_program
+
+    parser = argparse.ArgumentParser(
+        prog='python -m intcode.profiler',
+        description="Profile a day's Intcode program.")
+    parser.add_argument('day', help='the day, e.g. 09 (reads DAY/input)')
+    parser.add_argument('inputs', nargs='*',
+                        help='inputs: numbers, or words sent as ASCII lines')
+    parser.add_argument('--top', type=int, default=10,
+                        help='how many addresses and blocks to list')
+    parser.add_argument('--no-annotate', action='store_true',
+                        help='leave out the annotated disassembly')
+    parser.add_argument('--calls', action='store_true',
+                        help='profile by subroutine, and print the call tree')
+    parser.add_argument('--collapsed', metavar='FILE',
+                        help='with --calls, write collapsed stacks to FILE')
+    args = parser.parse_args()
+
+    profiler = CallGraph() if args.calls else Profiler()
+    c = Computer(args.day, load_program(os.path.join(args.day, 'input')),
+                 profile=profiler)
+    for arg in args.inputs:
+        try:
+            c.input_stack.append(int(arg))
+        except ValueError:
+            c.input_stack += [ord(char) for char in arg + '\n']
+    c.run_intcode()
+    print(profiler.report(args.top))
+    if args.calls:
+        print()
+        print(profiler.tree())
+        if args.collapsed:
+            with open(args.collapsed, 'w') as f:
+                f.write(profiler.collapsed() + '\n')
+    elif not args.no_annotate:
+        print()
+        print(c.profiler.annotate())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Recording an Intcode session so that any point of it can be gone back to.
+
+A ``Computer`` built with ``record=K`` runs through ``Recorder.run``, an
+interpreter loop that logs every input the program takes (with the number of
+instructions run before it) and keeps a snapshot of the computer every ``K``
+instructions.  Running is deterministic, so that is enough to get the
+computer as it was after any number of instructions: ``seek(n)`` forks the
+last snapshot taken at or before ``n``, queues the inputs the program took
+after it, and runs forward to ``n``, so it costs at most ``K`` instructions
+however long the session has been.
+
+Snapshots share memory pages with the computer and with each other (see
+``Computer.fork``), so each costs the pages written since the one before.
+``K`` trades that memory for the time a ``seek`` takes.
+"""
+from bisect import bisect_right
+
+from .computer import NEEDS_INPUT, PAUSED
+from .memory import PAGE_BITS, PAGE_MASK
+
+
+class Recorder():
+    """
+    The log and snapshots of one computer's session, snapshotting every
+    ``every`` instructions.  ``inputs`` is a list of (instructions run before
+    it, value) and ``checkpoints`` one of (instructions run, snapshot,
+    inputs taken).
+    """
+    def __init__(self, every=10000):
+        self.every = every
+        self.inputs = []
+        self.checkpoints = []
+
+    def run(self, vm, stop=None):
+        """
+        Run ``vm`` as ``Computer._run`` does, recording as it goes (or, with
+        ``stop``, only up to ``stop`` instructions into the session, without
+        recording, returning ``PAUSED`` when it gets there).
+        """
+        mem = vm.mem
+        pages = mem.pages
+        pc = vm.pos
+        done = vm.iteration - 1
+        count = 0
+        if stop is None:
+            if not self.checkpoints:
+                self._checkpoint(vm, done)
+            due = self.checkpoints[-1][0] + self.every
+        else:
+            due = stop
+        try:
+            while True:
+                if done + count >= due:
+                    vm.pos = pc
+                    vm.iteration += count
+                    done += count
+                    count = 0
+                    if stop is not None:
+                        return PAUSED
+                    self._checkpoint(vm, done)
+                    due = done + self.every
+                try:
+                    step = vm._decoded[pc]
+                except KeyError:
+                    step = vm._decode(pc)
+                word = pages[pc >> PAGE_BITS][pc & PAGE_MASK]
+                if word % 100 == 3 and stop is None:
+                    # where the input will go, before the step can move rb
+                    p = mem[pc + 1]
+                    addr = p + vm.rel_base if word // 100 % 10 == 2 else p
+                    nxt = step(vm, pages)
+                    if nxt == NEEDS_INPUT:
+                        return nxt
+                    self.inputs.append((done + count, mem[addr]))
+                else:
+                    nxt = step(vm, pages)
+                    if nxt < 0:
+                        return nxt
+                count += 1
+                pc = nxt
+        finally:
+            vm.pos = pc
+            vm.iteration += count
+
+    def _checkpoint(self, vm, done):
+        self.checkpoints.append((done, vm.snapshot(), len(self.inputs)))
+
+    def seek(self, instructions):
+        """
+        Return a new computer as the recorded one was ``instructions``
+        instructions into the session, with the inputs the session went on
+        to take queued (clear its ``input_stack`` to give it others).
+        """
+        counts = [done for done, _, _ in self.checkpoints]
+        i = bisect_right(counts, instructions) - 1
+        if i < 0:
+            raise ValueError(f'nothing was recorded {instructions} '
+                             f'instructions in')
+        _, snapshot, taken = self.checkpoints[i]
+        vm = snapshot.fork()
+        vm.input_stack = [value for _, value in self.inputs[taken:]]
+        status = vm._run_faults(lambda: self.run(vm, stop=instructions))
+        if status != PAUSED:
+            raise ValueError(f'the session only goes to '
+                             f'{vm.iteration - 1} instructions')
+        return vm
+
+    def rewind(self, instructions):
+        """
+        Forget everything recorded past ``instructions`` instructions in,
+        as when the computer is put back to an earlier state.
+        """
+        while self.checkpoints and self.checkpoints[-1][0] > instructions:
+            self.checkpoints.pop()
+        while self.inputs and self.inputs[-1][0] >= instructions:
+            self.inputs.pop()
+
+    def clear(self):
+        """Forget the whole session, as when the computer is reset."""
+        self.inputs = []
+        self.checkpoints = []
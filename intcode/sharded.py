@@ -0,0 +1,180 @@
+"""
+The day 23 network spread over several processes.
+
+``ShardedNetwork`` splits the NICs of a ``Network`` (usually a big, synthetic
+one, made of ``copies`` of the 50-NIC network) into contiguous blocks, one
+per worker process, each running its block as a ``Network`` of its own.
+Work goes in rounds: the coordinator sends every worker, over its pipe, one
+batch with all the packets for its NICs, each worker runs until all of its
+NICs are idle, and sends back one batch with the packets its NICs sent to
+NICs in other blocks, and those they sent to the NATs.  Once a round ends
+with no packets left to deliver, every NIC everywhere is idle, which is the
+coordinated idle check: the NATs' packets are sent out as the next round's.
+
+Packets reaching a NIC from two other blocks in the same round arrive in
+block order, rather than in the order they were sent, and of two packets sent
+to one NAT in the same round by NICs in different blocks the later block's
+counts as the last.  The day 23 program doesn't depend on either.
+
+The program goes to the workers through shared memory (see
+``intcode.loader``), rather than each of them parsing it.
+
+Rounds, and the trips through the pipes, cost enough that a worker gets
+through packets at only a fraction (``SHARD_EFFICIENCY``) of the rate of a
+``Network`` in the calling process, so sharding only pays with more cores
+than that makes up for.  ``network`` builds a ``ShardedNetwork`` only then,
+and a plain ``Network`` otherwise.
+"""
+import multiprocessing
+from functools import partial
+
+from .computer import Computer
+from .loader import SharedProgram, attach
+from .network import Network
+
+# a worker's packets per second over those of a Network in one process, on
+# the 1,000-NIC network (1 worker against one process in intcode.bench)
+SHARD_EFFICIENCY = 0.35
+
+
+def _worker(conn, handle, n, copies, nodes, options):
+    """Run one block of a ``ShardedNetwork``, a round per message."""
+    network = Network(attach(handle), n, partial(Computer, **options),
+                      copies, nodes)
+    while True:
+        packets = conn.recv()
+        if packets is None:
+            break
+        for to, x, y in packets:
+            network.deliver(to, x, y)
+        network.run_until_idle()
+        conn.send((network.remote, network.nat_log, network.packets))
+        network.remote = []
+        network.nat_log = []
+    conn.close()
+
+
+class ShardedNetwork():
+    """
+    ``n`` NICs times ``copies`` running ``inp``, spread over ``workers``
+    processes, with ``options`` (e.g. ``{'compiled': True}``) passed on to
+    each ``Computer``.  It has the ``run_until_nat``/``run_until_repeat``
+    interface of ``Network``, and should be closed when done with (or used
+    as a context manager).  ``packets`` counts the packets delivered.
+    """
+    def __init__(self, inp, n=50, copies=1, workers=None, options=None):
+        self.n = n
+        total = n * copies
+        workers = min(workers or multiprocessing.cpu_count(), total)
+        # NIC g goes to block g * workers // total
+        self.blocks = [range(-(-total * i // workers),
+                             -(-total * (i + 1) // workers))
+                       for i in range(workers)]
+        self.shared = SharedProgram(inp)
+        self.conns = []
+        self.procs = []
+        for nodes in self.blocks:
+            ours, theirs = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_worker,
+                args=(theirs, self.shared.handle, n, copies, nodes,
+                      options or {}),
+                daemon=True)
+            proc.start()
+            theirs.close()
+            self.conns.append(ours)
+            self.procs.append(proc)
+        self.nats = [None] * copies
+        self.first_nat = None
+        self.packets = 0
+        self.rounds = 0
+        # the packets waiting to be sent in the next round
+        self.pending = []
+
+    @property
+    def nat(self):
+        return self.nats[0]
+
+    def _block(self, g):
+        return g * len(self.blocks) // (self.n * len(self.nats))
+
+    def round(self):
+        """
+        Run one round.  Returns ``False`` if it ended with every NIC idle
+        and no packets left to deliver.
+        """
+        batches = [[] for _ in self.blocks]
+        for packet in self.pending:
+            batches[self._block(packet[0])].append(packet)
+        for conn, batch in zip(self.conns, batches):
+            conn.send(batch)
+        self.pending = []
+        self.packets = 0
+        for conn in self.conns:
+            remote, nat_log, packets = conn.recv()
+            self.pending += remote
+            self.packets += packets
+            for copy, x, y in nat_log:
+                self.nats[copy] = (x, y)
+                if self.first_nat is None:
+                    self.first_nat = (x, y)
+        self.rounds += 1
+        return bool(self.pending)
+
+    def run_until_idle(self):
+        while self.round():
+            pass
+
+    def wake(self):
+        """Have each NAT send its last packet on, as ``Network.wake``."""
+        if None in self.nats:
+            raise RuntimeError('the network is idle, but a NAT has no '
+                               'packet to send')
+        self.pending = [(copy * self.n, x, y)
+                        for copy, (x, y) in enumerate(self.nats)]
+        return self.nat
+
+    def run_until_nat(self):
+        while self.first_nat is None:
+            if not self.round() and self.first_nat is None:
+                raise RuntimeError('the network went idle before sending '
+                                   'anything to the NAT')
+        return self.first_nat
+
+    def run_until_repeat(self):
+        last_y = None
+        while True:
+            self.run_until_idle()
+            x, y = self.wake()
+            if y == last_y:
+                return x, y
+            last_y = y
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(None)
+            conn.close()
+        for proc in self.procs:
+            proc.join()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def network(inp, n=50, copies=1, workers=None, options=None):
+    """
+    A ``ShardedNetwork`` over ``workers`` processes (one per core by
+    default, and never more than there are cores) if that many would
+    outrun a single process, going by ``SHARD_EFFICIENCY``, and otherwise
+    a ``Network`` of ``Computer``s with ``options``.  Either one has
+    ``close`` and can be used as a context manager.
+    """
+    cores = multiprocessing.cpu_count()
+    workers = min(workers or cores, cores, n * copies)
+    if workers * SHARD_EFFICIENCY > 1:
+        return ShardedNetwork(inp, n, copies, workers, options)
+    return Network(inp, n, partial(Computer, **(options or {})), copies)
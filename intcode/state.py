@@ -0,0 +1,217 @@
+"""
+Saving a computer's state to a compact binary file, and loading it back.
+
+A saved state doesn't hold the program: it holds the program image's
+``digest``, and only the memory pages that differ from the image (or, past
+the end of it, that aren't all zeros), so it's about as big as the memory
+the program has actually changed.  Along with those go the position,
+relative base and instruction count, the inputs waiting in ``input_stack``,
+and the outputs: ``total_output``, ``this_runs_output``, the last output,
+and, for a computer with ``frames``, the records its ``Frames`` holds (and
+any record not yet complete).  Loading builds a new computer for the same
+program and puts all of that back; the program has to be given again, and
+is checked against the digest.  A ``Frames`` is made for the loaded
+computer if it wasn't built with one, but a spill file isn't reopened.
+
+The format starts with ``MAGIC``, a version number and flags; with
+``COMPRESSED`` set, the rest is zlib-compressed.  States saved as version 1,
+from before frames, can still be loaded: they held ``total_output`` and how
+many of those were from the last run, and nothing else about outputs.  Numbers are little-endian
+int64s, and runs of values that don't all fit in 64 bits are stored as
+decimal text instead.
+"""
+import io
+import struct
+import sys
+import zlib
+from array import array
+
+from .memory import PAGE_BITS, PAGE_SIZE, ZERO_PAGE
+
+MAGIC = b'ICST'
+VERSION = 2
+HEADER = struct.Struct('<4sHH')
+
+# flags
+COMPRESSED = 1
+
+# image digest and size, position, relative base, iteration, output
+# position and current opcode (-1 for None), outputs so far (in version 1,
+# outputs from the last run), and the length of the page table
+STATE = struct.Struct('<16sQqqqqqqQ')
+
+# the frames' arity (0 if there are none), keep (-1 for None), count of
+# records, and whether records are queued
+FRAMES = struct.Struct('<qqqB')
+
+# how a run of values is stored: kind, then count of values (or of bytes)
+VALUES = struct.Struct('<BQ')
+INT64 = 0
+TEXT = 1
+
+PAGE_INDEX = struct.Struct('<Q')
+
+
+def _write_values(f, values):
+    try:
+        packed = array('q', values)
+    except OverflowError:
+        text = ','.join(map(str, values)).encode()
+        f.write(VALUES.pack(TEXT, len(text)))
+        f.write(text)
+        return
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    f.write(VALUES.pack(INT64, len(packed)))
+    f.write(packed.tobytes())
+
+
+def _read_values(f):
+    kind, n = VALUES.unpack(f.read(VALUES.size))
+    if kind == INT64:
+        values = array('q')
+        values.frombytes(f.read(n * 8))
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+    text = f.read(n).decode()
+    return [int(i) for i in text.split(',')] if text else []
+
+
+def _changed_pages(mem):
+    """Yield (index, page) for the pages a state has to hold."""
+    image_pages = mem.image.pages
+    for i in sorted(mem.dirty):
+        if i >= len(mem.pages):
+            continue
+        page = mem.pages[i]
+        base = image_pages[i] if i < len(image_pages) else ZERO_PAGE
+        if list(page) != list(base):
+            yield i, page
+
+
+def _dump_frames(f, frames):
+    if frames is None:
+        f.write(FRAMES.pack(0, 0, 0, 0))
+        return
+    f.write(FRAMES.pack(frames.arity, -1 if frames.keep is None else
+                        frames.keep, frames.count, frames.queue))
+    _write_values(f, frames._partial)
+    for records in (frames.ready, frames.kept):
+        _write_values(f, [value for record in records for value in record])
+
+
+def _load_frames(f, computer):
+    arity, keep, count, queue = FRAMES.unpack(f.read(FRAMES.size))
+    if not arity:
+        if computer.frames is not None:
+            raise ValueError('saved state has no frames, but the computer '
+                             'has')
+        return
+    keep = None if keep < 0 else keep
+    frames = computer.frames
+    if frames is None:
+        from .framing import Frames
+        frames = computer.frames = Frames(arity, keep, queue=bool(queue))
+    elif frames.arity != arity:
+        raise ValueError(f'saved frames are of {arity} outputs, not '
+                         f'{frames.arity}')
+    frames.clear()
+    frames.count = count
+    frames._partial = list(_read_values(f))
+    for records in (frames.ready, frames.kept):
+        values = list(_read_values(f))
+        records.extend(tuple(values[i:i + arity])
+                       for i in range(0, len(values), arity))
+
+
+def _load_outputs_v1(computer, unread):
+    """
+    Work out the outputs of a version 1 state, where ``output_count`` is the
+    number of outputs from the last run instead.
+    """
+    if computer.frames is not None:
+        raise ValueError('saved state has no frames, but the computer has')
+    outputs = computer.total_output
+    computer.this_runs_output = outputs[len(outputs) - unread:]
+    computer.output_count = len(outputs)
+    if outputs:
+        computer.last_output = computer.output = outputs[-1]
+
+
+def dump(vm, f, compress=False):
+    """Write the state of the computer ``vm`` to the binary file ``f``."""
+    body = io.BytesIO()
+    image = vm.mem.image
+    body.write(STATE.pack(
+        image.digest, image.size, vm.pos, vm.rel_base, vm.iteration,
+        -1 if vm.output_pos is None else vm.output_pos,
+        -1 if vm.cur_opcode is None else vm.cur_opcode,
+        vm.output_count, len(vm.mem.pages)))
+    _write_values(body, vm.input_stack)
+    _write_values(body, vm.total_output)
+    _write_values(body, vm.this_runs_output)
+    _write_values(body, [] if vm.last_output is None else [vm.last_output])
+    _dump_frames(body, vm.frames)
+    pages = list(_changed_pages(vm.mem))
+    body.write(PAGE_INDEX.pack(len(pages)))
+    for i, page in pages:
+        body.write(PAGE_INDEX.pack(i))
+        _write_values(body, page)
+    data = body.getvalue()
+    f.write(HEADER.pack(MAGIC, VERSION, COMPRESSED if compress else 0))
+    f.write(zlib.compress(data) if compress else data)
+
+
+def load(f, computer):
+    """
+    Read a state from the binary file ``f`` into ``computer``, a computer
+    just built for the same program.
+    """
+    magic, version, flags = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('not a saved Intcode computer')
+    if version not in (1, VERSION):
+        raise ValueError(f'saved state is version {version}, not 1 or '
+                         f'{VERSION}')
+    data = f.read()
+    body = io.BytesIO(zlib.decompress(data) if flags & COMPRESSED else data)
+    (digest, size, pos, rel_base, iteration, output_pos, cur_opcode,
+     output_count, n_pages) = STATE.unpack(body.read(STATE.size))
+    mem = computer.mem
+    if digest != mem.image.digest or size != mem.image.size:
+        raise ValueError('saved state is for a different program')
+
+    computer.pos = pos
+    computer.rel_base = rel_base
+    computer.iteration = iteration
+    computer.output_pos = None if output_pos < 0 else output_pos
+    computer.cur_opcode = None if cur_opcode < 0 else cur_opcode
+    computer.input_stack = list(_read_values(body))
+    computer.total_output = list(_read_values(body))
+    if version == 1:
+        _load_outputs_v1(computer, output_count)
+    else:
+        computer.this_runs_output = list(_read_values(body))
+        computer.output_count = output_count
+        last = _read_values(body)
+        if len(last):
+            computer.last_output = computer.output = last[0]
+        _load_frames(body, computer)
+
+    mem.grow((n_pages << PAGE_BITS) - 1)
+    (count,) = PAGE_INDEX.unpack(body.read(PAGE_INDEX.size))
+    for _ in range(count):
+        (i,) = PAGE_INDEX.unpack(body.read(PAGE_INDEX.size))
+        values = _read_values(body)
+        if len(values) != PAGE_SIZE:
+            raise ValueError(f'saved page {i} has {len(values)} cells')
+        old = mem.pages[i]
+        mem.pages[i] = values
+        mem.dirty.add(i)
+        # anything decoded from a cell that's different now is out of date
+        base = i << PAGE_BITS
+        for offset, (was, now) in enumerate(zip(old, values)):
+            if was != now and base + offset in computer._owners:
+                computer._invalidate(base + offset)
+    return computer
@@ -0,0 +1,88 @@
+"""
+Running one program over a whole space of inputs on a process pool.
+
+``sweep`` hands the items of an input iterator out to worker processes a
+chunk at a time.  The program is put in shared memory once (see
+``intcode.loader``), and each worker maps it into a ``ComputerPool`` when it
+starts, so neither starting a worker nor a query costs anything for the
+length of the program: a query only costs the instructions it runs.
+Results come back through ``imap_unordered`` as soon as they are ready, in
+no particular order, are folded together by a reducer, and can stop the
+sweep early: once the ``stop`` predicate matches a result, the workers are
+terminated and whatever they were still doing is dropped.
+"""
+import multiprocessing
+import os
+import time
+
+from .loader import SharedProgram, attach
+from .pool import ComputerPool
+
+# the worker's pool and query function, set up by _start
+_pool = None
+_query = None
+
+
+def feed(c, item):
+    """
+    The default query: ``item`` (one value, or a sequence of them) as the
+    program's inputs.  Returns all of its outputs.
+    """
+    c.input_stack = list(item) if hasattr(item, '__iter__') else [item]
+    c.run_intcode()
+    return c.total_output
+
+
+def collect(results, item, result):
+    """The default reducer: a list of (item, result) pairs."""
+    results.append((item, result))
+    return results
+
+
+def _start(handle, query):
+    global _pool, _query
+    _pool = ComputerPool(attach(handle))
+    _query = query
+
+
+def _run(item):
+    with _pool.computer() as c:
+        return item, _query(c, item)
+
+
+def sweep(program, inputs, reducer=collect, initial=None, query=feed,
+          stop=None, workers=None, chunk=64, report=False):
+    """
+    Run ``program`` once for every item of ``inputs`` on ``workers``
+    processes (one per core by default), ``chunk`` items to a task.
+
+    ``query(computer, item)`` runs one item on a freshly reset computer and
+    returns its result (``feed`` by default).  Each result is folded in with
+    ``reducer(accumulated, item, result)``, starting from ``initial`` (a new
+    list if it's None), as it arrives.  If ``stop(item, result)`` is given
+    and returns true, the sweep ends there.  ``query`` and the items have
+    to be picklable.  With ``report`` set, the throughput is printed at the
+    end.  Returns the accumulated value.
+    """
+    if initial is None:
+        initial = []
+    workers = workers or os.cpu_count()
+    acc = initial
+    count = 0
+    start = time.perf_counter()
+    with SharedProgram(program) as shared, \
+            multiprocessing.Pool(workers, _start,
+                                 (shared.handle, query)) as pool:
+        for item, result in pool.imap_unordered(_run, inputs, chunk):
+            acc = reducer(acc, item, result)
+            count += 1
+            if stop is not None and stop(item, result):
+                break
+    elapsed = time.perf_counter() - start
+    if report:
+        rate = count / elapsed
+        cores = min(workers, os.cpu_count())
+        print(f'{count:,} queries in {elapsed:.2f}s: {rate:,.0f} queries/s, '
+              f'{rate / cores:,.0f} per core ({workers} workers on {cores} '
+              f'cores)')
+    return acc
@@ -0,0 +1,487 @@
+"""
+Symbolic execution of Intcode programs.
+
+Instead of running a program once per candidate input, chosen memory cells
+and inputs are set to symbols, and values are carried through additions and
+multiplications as polynomials in them (``Poly``).  When nothing the program
+branches on depends on a symbol, one run gives the outputs (and final
+memory) as polynomials, and ``solve`` finds the symbol values that give a
+wanted result: day 2 part 2 in one run rather than 10,000.
+
+Comparisons and jumps on symbolic values are where control flow comes to
+depend on the symbols.  There, the run splits in two (``SymbolicComputer``
+keeps a list of ``Path``), each half going on with the condition it assumed
+added to its path conditions, so the result is the set of ways through the
+program, each with the conditions on the symbols for taking it.  Conditions
+that the earlier ones or the symbols' ranges (``domains``) already decide
+don't split the run.  For day 19 that lays out the beam as the conditions
+under which the drone program outputs 1.
+
+Every condition is kept as ``p >= 0``, ``p == 0`` or ``p != 0`` for a
+polynomial ``p``; ``x < y`` becomes ``y - x - 1 >= 0``, since values are
+integers.  Reading memory at a symbolic address (day 2's first instruction
+adds the cells its noun and verb point at) gives a new symbol standing for
+whatever is there, named like ``mem[noun]``, which is fine as long as it
+doesn't end up mattering; nothing is known about its values, so ``solve``
+can't get past one.  Everything else has to stay concrete: a program whose
+instructions, jump targets, write addresses or relative base depend on the
+symbols raises ``SymbolicError``.
+"""
+import itertools
+
+from .computer import decode
+
+# give up once a run has split into more paths than this
+MAX_PATHS = 4096
+
+# and once one path has run this many instructions (probably looping on a
+# symbolic value)
+MAX_STEPS = 1000000
+
+
+class SymbolicError(Exception):
+    """The program did something that can't be followed symbolically."""
+
+
+class Poly():
+    """
+    A polynomial with integer coefficients.  ``terms`` maps each monomial, a
+    sorted tuple of (symbol name, power) pairs, to its coefficient; the
+    constant term's monomial is ``()``.
+    """
+    __slots__ = ('terms',)
+
+    def __init__(self, terms):
+        self.terms = {mono: coef for mono, coef in terms.items() if coef}
+
+    @classmethod
+    def lift(cls, value):
+        if isinstance(value, Poly):
+            return value
+        return cls({(): value})
+
+    def constant(self):
+        """The value of a polynomial with no symbols in it, or None."""
+        if all(mono == () for mono in self.terms):
+            return self.terms.get((), 0)
+        return None
+
+    def symbols(self):
+        return {name for mono in self.terms for name, _ in mono}
+
+    def degree(self, name):
+        return max((power for mono in self.terms for n, power in mono
+                    if n == name), default=0)
+
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for mono, coef in Poly.lift(other).terms.items():
+            terms[mono] = terms.get(mono, 0) + coef
+        return Poly(terms)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Poly({mono: -coef for mono, coef in self.terms.items()})
+
+    def __sub__(self, other):
+        return self + -Poly.lift(other)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        terms = {}
+        for (m1, c1), (m2, c2) in itertools.product(
+                self.terms.items(), Poly.lift(other).terms.items()):
+            powers = dict(m1)
+            for name, power in m2:
+                powers[name] = powers.get(name, 0) + power
+            mono = tuple(sorted(powers.items()))
+            terms[mono] = terms.get(mono, 0) + c1 * c2
+        return Poly(terms)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, int):
+            other = Poly.lift(other)
+        return isinstance(other, Poly) and self.terms == other.terms
+
+    def __hash__(self):
+        return hash(frozenset(self.terms.items()))
+
+    def substitute(self, values):
+        """
+        Replace the symbols in ``values`` (name -> int) with their values;
+        returns an int if no symbols are left.
+        """
+        out = Poly({})
+        for mono, coef in self.terms.items():
+            term = Poly({(): coef})
+            rest = []
+            for name, power in mono:
+                if name in values:
+                    term = term * values[name] ** power
+                else:
+                    rest.append((name, power))
+            out = out + Poly({tuple(rest): 1}) * term
+        return concrete(out)
+
+    def bounds(self, domains):
+        """
+        The (lowest, highest) values the polynomial can take with each symbol
+        in its domain, by interval arithmetic (so not always tight), or None
+        if a symbol has no domain.
+        """
+        lo = hi = 0
+        for mono, coef in self.terms.items():
+            t_lo = t_hi = coef
+            for name, power in mono:
+                if name not in domains:
+                    return None
+                d_lo, d_hi = min(domains[name]), max(domains[name])
+                ends = (d_lo ** power, d_hi ** power)
+                p_lo, p_hi = min(ends), max(ends)
+                if power % 2 == 0 and d_lo < 0 < d_hi:
+                    p_lo = 0
+                products = (t_lo * p_lo, t_lo * p_hi, t_hi * p_lo, t_hi * p_hi)
+                t_lo, t_hi = min(products), max(products)
+            lo += t_lo
+            hi += t_hi
+        return lo, hi
+
+    def __str__(self):
+        if not self.terms:
+            return '0'
+        parts = []
+        for mono, coef in sorted(self.terms.items(),
+                                 key=lambda t: (-sum(p for _, p in t[0]), t)):
+            factors = [name if power == 1 else f'{name}^{power}'
+                       for name, power in mono]
+            if coef != 1 or not factors:
+                if coef == -1 and factors:
+                    factors.insert(0, '-')
+                else:
+                    factors.insert(0, str(coef))
+            term = '*'.join(factors).replace('-*', '-')
+            if parts:
+                parts.append(f'- {term[1:]}' if term.startswith('-')
+                             else f'+ {term}')
+            else:
+                parts.append(term)
+        return ' '.join(parts)
+
+    def __repr__(self):
+        return f'Poly({self})'
+
+
+def symbol(name):
+    """Return the polynomial consisting of just the symbol ``name``."""
+    return Poly({((name, 1),): 1})
+
+
+def concrete(value):
+    """Return ``value`` as an int if it has no symbols in it."""
+    if isinstance(value, Poly):
+        c = value.constant()
+        return value if c is None else c
+    return value
+
+
+# conditions, as (relation, polynomial) pairs compared with 0, and their
+# opposites
+_NEGATE = {'==': '!=', '!=': '=='}
+
+
+def negate(cond):
+    rel, p = cond
+    if rel == '>=':
+        # not p >= 0  is  p < 0  is  -p - 1 >= 0
+        return ('>=', -p - 1)
+    return (_NEGATE[rel], p)
+
+
+def holds(cond, values):
+    """Whether ``cond`` is true for the symbol values ``values``."""
+    rel, p = cond
+    v = p.substitute(values)
+    if isinstance(v, Poly):
+        raise ValueError(f'no value given for {", ".join(v.symbols())}')
+    return {'>=': v >= 0, '==': v == 0, '!=': v != 0}[rel]
+
+
+def format_condition(cond):
+    rel, p = cond
+    return f'{p} {rel} 0'
+
+
+class Path():
+    """
+    One way through the program: the conditions on the symbols for taking
+    it, its outputs, and its memory and position where it stopped.
+    ``halted`` is False if it stopped for want of input.
+    """
+    def __init__(self, mem, pos=0, rel_base=0, inputs=(), domains=None):
+        self.mem = mem
+        self.pos = pos
+        self.rel_base = rel_base
+        self.inputs = list(inputs)
+        # name -> [lowest, highest] value each symbol can still take on this
+        # path (None where there's no limit)
+        self.ranges = {name: [min(d), max(d)]
+                       for name, d in (domains or {}).items()}
+        self.conditions = []
+        self.output = []
+        self.halted = False
+        self.iteration = 0
+
+    def fork(self):
+        other = Path(list(self.mem), self.pos, self.rel_base, self.inputs)
+        other.ranges = {name: list(r) for name, r in self.ranges.items()}
+        other.conditions = list(self.conditions)
+        other.output = list(self.output)
+        other.iteration = self.iteration
+        return other
+
+    @property
+    def domains(self):
+        """The symbols' ranges on this path, for those limited both ways."""
+        return {name: r for name, r in self.ranges.items() if None not in r}
+
+    def assume(self, cond):
+        """
+        Add ``cond`` to the path's conditions, narrowing the range of its
+        symbol if it's linear in just one.  Returns False if it's found to
+        contradict the conditions so far (if that leaves a symbol no values,
+        or it can't hold together with any one other ``>=`` condition), so
+        the path can't be taken.
+        """
+        self.conditions.append(cond)
+        rel, p = cond
+        if rel == '>=':
+            domains = self.domains
+            for other_rel, q in self.conditions[:-1]:
+                if other_rel == '>=':
+                    b = (p + q).bounds(domains)
+                    if b is not None and b[1] < 0:
+                        return False
+        names = p.symbols()
+        if len(names) != 1 or p.degree(min(names)) != 1:
+            return True
+        name, = names
+        a = p.terms[((name, 1),)]
+        b = p.terms.get((), 0)
+        lo, hi = r = self.ranges.setdefault(name, [None, None])
+        if rel == '>=':
+            # a * name + b >= 0
+            if a > 0:
+                r[0] = -(b // a) if lo is None else max(lo, -(b // a))
+            else:
+                r[1] = b // -a if hi is None else min(hi, b // -a)
+        elif rel == '==':
+            if b % a:
+                return False
+            value = -b // a
+            if (lo is not None and value < lo
+                    or hi is not None and value > hi):
+                return False
+            r[:] = [value, value]
+        elif lo is not None and a * lo + b == 0:
+            r[0] += 1
+        elif hi is not None and a * hi + b == 0:
+            r[1] -= 1
+        return None in r or r[0] <= r[1]
+
+    def decide(self, cond):
+        """
+        True or False if ``cond`` is already settled on this path (by the
+        conditions so far or the domains), otherwise None.
+        """
+        rel, p = cond
+        c = p.constant()
+        if c is not None:
+            return holds(cond, {})
+        if cond in self.conditions:
+            return True
+        if negate(cond) in self.conditions:
+            return False
+        b = p.bounds(self.domains)
+        if b is not None:
+            lo, hi = b
+            if rel == '>=':
+                if lo >= 0:
+                    return True
+                if hi < 0:
+                    return False
+            elif lo > 0 or hi < 0:
+                return rel == '!='
+            elif lo == hi == 0:
+                return rel == '=='
+        return None
+
+    def __repr__(self):
+        conds = ' and '.join(map(format_condition, self.conditions)) or 'always'
+        out = ', '.join(map(str, self.output))
+        return f'<Path if {conds}: output [{out}]>'
+
+
+class SymbolicComputer():
+    """
+    Runs a program with some memory cells and inputs left as symbols.
+
+    ``cells`` maps addresses to the values to put there before running
+    (ints, or symbols made with ``symbol``), ``inputs`` is the list of
+    values the program reads, and ``domains`` optionally gives the range of
+    values (anything with a min and max) each symbol can take, which lets
+    impossible paths be dropped.  ``run`` returns the list of ``Path``.
+    """
+    def __init__(self, inp, cells=None, inputs=(), domains=None):
+        mem = [int(i) for i in inp.split(',')]
+        for addr, value in (cells or {}).items():
+            mem[addr] = value
+        self.paths = [Path(mem, inputs=inputs, domains=domains)]
+        self.done = []
+
+    def run(self):
+        """Follow every path until it halts or needs input."""
+        while self.paths:
+            path = self.paths.pop()
+            self._run_path(path)
+            self.done.append(path)
+        return self.done
+
+    def _split(self, path, cond):
+        """
+        Return whether ``cond`` holds on ``path``, splitting off a path on
+        which it doesn't if that isn't already decided.
+        """
+        known = path.decide(cond)
+        if known is not None:
+            return known
+        if len(self.paths) + len(self.done) + 1 >= MAX_PATHS:
+            raise SymbolicError(f'more than {MAX_PATHS} paths')
+        other = path.fork()
+        if not other.assume(negate(cond)):
+            return path.assume(cond)
+        if not path.assume(cond):
+            path.conditions[-1:] = other.conditions[-1:]
+            path.ranges = other.ranges
+            return False
+        self.paths.append(other)
+        return True
+
+    def _run_path(self, path):
+        mem = path.mem
+
+        def address(mode, p):
+            addr = p if mode != 2 else p + path.rel_base
+            if addr < 0:
+                raise IndexError(f'Intcode address {addr} is out of range')
+            if addr >= len(mem):
+                mem.extend([0] * (addr + 1 - len(mem)))
+            return addr
+
+        def read(mode, p):
+            if mode == 1:
+                return p
+            if isinstance(p, Poly):
+                if mode == 2:
+                    p = p + path.rel_base
+                return symbol(f'mem[{p}]')
+            return mem[address(mode, p)]
+
+        def store(mode, p, value):
+            mem[address(mode, need(p, 'write address'))] = concrete(value)
+
+        def need(value, what):
+            if isinstance(value, Poly):
+                raise SymbolicError(f'{what} at position {path.pos} depends '
+                                    f'on the symbols: {value}')
+            return value
+
+        while True:
+            pc = path.pos
+            need(mem[pc], 'instruction')
+            opcode, modes, params = decode(mem, pc)
+            nxt = pc + len(params) + 1
+
+            if opcode in (1, 2):
+                x, y = read(modes[0], params[0]), read(modes[1], params[1])
+                value = x + y if opcode == 1 else x * y
+                store(modes[2], params[2], value)
+            elif opcode in (7, 8):
+                diff = Poly.lift(read(modes[1], params[1])) - read(modes[0],
+                                                                   params[0])
+                if opcode == 7:
+                    cond = ('>=', diff - 1)
+                else:
+                    cond = ('==', diff)
+                store(modes[2], params[2], int(self._split(path, cond)))
+            elif opcode in (5, 6):
+                test = Poly.lift(read(modes[0], params[0]))
+                cond = ('!=' if opcode == 5 else '==', test)
+                if self._split(path, cond):
+                    nxt = need(read(modes[1], params[1]), 'jump target')
+            elif opcode == 9:
+                path.rel_base += need(read(modes[0], params[0]),
+                                      'relative base')
+            elif opcode == 3:
+                if not path.inputs:
+                    return
+                store(modes[0], params[0], path.inputs.pop(0))
+            elif opcode == 4:
+                path.output.append(read(modes[0], params[0]))
+            else:
+                path.halted = True
+                return
+            path.pos = nxt
+            path.iteration += 1
+            if path.iteration >= MAX_STEPS:
+                raise SymbolicError(f'path ran for {MAX_STEPS} instructions: '
+                                    f'{path}')
+
+
+def solve(expr, target, domains, conditions=()):
+    """
+    Yield every assignment of the symbols in ``expr`` (name -> value, each
+    within ``domains``) that makes it equal ``target`` and satisfies every
+    condition in ``conditions`` (e.g. a ``Path``'s).
+
+    The symbols but one are run through their domains; the last is solved
+    for directly when the polynomial is linear in it, so a two-symbol search
+    like day 2's takes one pass over one domain.
+    """
+    p = Poly.lift(expr) - target
+    names = set(p.symbols())
+    for _, cond in conditions:
+        names |= cond.symbols()
+    names = sorted(names)
+    missing = [n for n in names if n not in domains]
+    if missing[1:] or missing and p.degree(missing[0]) != 1:
+        raise ValueError(f'no domain given for {", ".join(missing)}')
+    if not names:
+        if p.constant() == 0:
+            yield {}
+        return
+    linear = [n for n in names if p.degree(n) == 1]
+    last = (missing or linear or names[-1:])[0]
+    others = [n for n in names if n != last]
+    for values in itertools.product(*(domains[n] for n in others)):
+        values = dict(zip(others, values))
+        q = Poly.lift(p.substitute(values))
+        if q.degree(last) == 1:
+            a = q.terms.get(((last, 1),), 0)
+            b = q.terms.get((), 0)
+            candidates = [-b // a] if b % a == 0 else []
+            if last in domains:
+                candidates = [v for v in candidates if v in domains[last]]
+        elif last not in domains:
+            raise ValueError(f'no domain given for {last}')
+        else:
+            candidates = [v for v in domains[last]
+                          if q.substitute({last: v}) == 0]
+        for v in candidates:
+            values[last] = v
+            if all(holds(cond, values) for cond in conditions):
+                yield dict(values)
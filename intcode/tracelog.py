@@ -0,0 +1,162 @@
+"""
+Execution traces written to a compact binary log.
+
+A ``Computer`` built with ``trace=`` (a path, or a file opened for binary
+writing) runs through ``TraceWriter.run``, an interpreter loop that writes a
+fixed-width record for every instruction it executes: the position, the
+instruction word, its three raw parameters, the relative base it ran with,
+and the address and value it wrote (or the value it output).  Without
+``trace``, as with ``debug_level``, nothing is formatted or written and the
+computer's run loops have no tracing code in them, so a run that isn't
+traced pays nothing for it.
+
+The log is a short header followed by the records, each ``RECORD.size``
+bytes.  Values that don't fit in 64 bits are stored wrapped to 64 bits, with
+the ``WRAPPED`` flag set.  ``read_trace`` reads a log back as ``Record``
+tuples, and ``python -m intcode.tracelog LOG`` prints it as text.
+"""
+import argparse
+import struct
+from collections import namedtuple
+
+from .computer import format_instr, split_word
+
+MAGIC = b'ICTR'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+# position, instruction word, flags, three parameters, the address written
+# (-1 if none), the value written or output, and the relative base
+RECORD = struct.Struct('<IHH6q')
+
+# flags
+WROTE = 1
+OUTPUT = 2
+WRAPPED = 4
+
+# opcodes whose last parameter is the address they write to
+WRITES = (1, 2, 3, 7, 8)
+
+Record = namedtuple('Record', 'pc word flags params addr value rel_base')
+
+
+def _wrap(value):
+    return (value + (1 << 63)) % (1 << 64) - (1 << 63)
+
+
+class TraceWriter():
+    """
+    Writes the trace of one or more computers to ``log``, a path or a binary
+    file.  ``close`` it when done (a file given to it is only flushed).
+    """
+    def __init__(self, log):
+        if isinstance(log, str):
+            self.file = open(log, 'wb')
+            self.owned = True
+        else:
+            self.file = log
+            self.owned = False
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.records = 0
+
+    def run(self, vm):
+        """Run ``vm`` as ``Computer._run`` does, writing each instruction."""
+        mem = vm.mem
+        pages = mem.pages
+        write, pack = self.file.write, RECORD.pack
+        pc = vm.pos
+        count = 0
+        try:
+            while True:
+                try:
+                    step = vm._decoded[pc]
+                except KeyError:
+                    step = vm._decode(pc)
+                word = mem[pc]
+                opcode, modes = split_word(word)
+                params = [mem[pc + i + 1] for i in range(len(modes))]
+                rb = vm.rel_base
+                nxt = step(vm, pages)
+                if nxt < 0:
+                    return nxt
+                flags, addr, value = 0, -1, 0
+                if opcode in WRITES:
+                    addr = params[-1] + rb if modes[-1] == 2 else params[-1]
+                    value = mem[addr]
+                    flags = WROTE
+                elif opcode == 4:
+                    value = vm.last_output
+                    flags = OUTPUT
+                fields = params + [0] * (3 - len(params)) + [addr, value, rb]
+                try:
+                    write(pack(pc, word, flags, *fields))
+                except struct.error:
+                    write(pack(pc, word, flags | WRAPPED,
+                               *map(_wrap, fields)))
+                count += 1
+                pc = nxt
+        finally:
+            self.records += count
+            self.file.flush()
+            vm.pos = pc
+            vm.iteration += count
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def read_trace(path):
+    """Yield the ``Record``s in the log at ``path``."""
+    with open(path, 'rb') as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an Intcode trace')
+        if version != VERSION or size != RECORD.size:
+            raise ValueError(f'{path} is a version {version} trace '
+                             f'({size}-byte records), not version {VERSION}')
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                break
+            for pc, word, flags, *fields in RECORD.iter_unpack(chunk):
+                yield Record(pc, word, flags, tuple(fields[:3]), *fields[3:])
+
+
+def format_record(record):
+    """One line of text for a record."""
+    opcode, modes = split_word(record.word)
+    instr = format_instr(opcode, modes, record.params[:len(modes)])
+    line = f'({record.pc:04d}) rb={record.rel_base:<6} {instr}'
+    if record.flags & WROTE:
+        line += f'  -> [{record.addr}] = {record.value}'
+    elif record.flags & OUTPUT:
+        line += f'  -> output {record.value}'
+    if record.flags & WRAPPED:
+        line += '  (wrapped to 64 bits)'
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m intcode.tracelog',
+        description='Print an Intcode trace log as text.')
+    parser.add_argument('log', help='the trace log')
+    parser.add_argument('--start', type=int, default=0,
+                        help='skip this many records first')
+    parser.add_argument('--limit', type=int,
+                        help='print at most this many records')
+    args = parser.parse_args()
+
+    for i, record in enumerate(read_trace(args.log)):
+        if i < args.start:
+            continue
+        if args.limit is not None and i >= args.start + args.limit:
+            break
+        print(f'{i:>10}  {format_record(record)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the tests import the package the way the day scripts do, from the root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,57 @@
+"""
+Computers wired together by ``asyncio`` queues and run with ``run_all``,
+checked against ``LegacyComputer`` run in turn by hand.
+"""
+import asyncio
+import itertools
+
+import pytest
+
+from intcode.aio import AsyncComputer, chain, run_all
+from intcode.legacy import LegacyComputer
+
+from test_modes import program
+
+
+def legacy_ring(inp, phases):
+    """Day 7's feedback loop, one amplifier at a time."""
+    amps = [LegacyComputer(f'{p}', inp, phase_setting=p) for p in phases]
+    value = 0
+    while True:
+        for amp in amps:
+            halted = amp.run_intcode(value) is False
+            value = amp.last_output
+        if halted:
+            return value
+
+
+@pytest.mark.parametrize('phases', list(itertools.permutations(
+    range(5, 10)))[::20])
+def test_ring(phases):
+    inp = program('07')
+
+    async def ring():
+        amps = chain([AsyncComputer(f'{p}', inp, phase_setting=p)
+                      for p in phases], loop=True)
+        amps[0].inbox.put_nowait(0)
+        await run_all(amps)
+        return amps[-1].last_output
+    assert asyncio.run(ring()) == legacy_ring(inp, phases)
+
+
+def test_input_from_outside():
+    # nothing can get going until the first amplifier's 0 comes from
+    # outside, after run_all has had to give way to the event loop
+    inp = program('07')
+    phases = (9, 8, 7, 6, 5)
+
+    async def fed():
+        amps = chain([AsyncComputer(f'{p}', inp, phase_setting=p)
+                      for p in phases], loop=True)
+
+        async def feed():
+            await asyncio.sleep(0.01)
+            amps[0].inbox.put_nowait(0)
+        await asyncio.gather(run_all(amps), feed())
+        return amps[-1].last_output
+    assert asyncio.run(fed()) == legacy_ring(inp, phases)
@@ -0,0 +1,57 @@
+"""
+Computers running the same program share the steps and blocks decoded from
+it; one that has changed its memory mustn't run anything decoded from the
+program as loaded.
+"""
+import io
+
+import pytest
+
+from intcode import Computer
+
+# adds 1 to 1 at cell 9 and outputs it; patching cell 1 changes the sum
+ADD = '1101,1,1,9,4,9,99,0,0,0'
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_patch_before_run(compiled):
+    a = Computer('a', ADD, compiled=compiled)
+    a.mem[1] = 40
+    # decoded from the program as loaded, into the cache a is sharing
+    Computer('b', ADD, compiled=compiled).run_intcode()
+    a.run_intcode()
+    assert a.total_output == [41]
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_patch_after_reset(compiled):
+    a = Computer('a', ADD, compiled=compiled)
+    a.run_intcode()
+    a.reset()
+    a.mem[1] = 40
+    Computer('b', ADD, compiled=compiled).run_intcode()
+    a.run_intcode()
+    assert a.total_output == [41]
+
+
+def test_patched_fork():
+    parent = Computer('parent', ADD)
+    child = parent.fork('child')
+    child.mem[1] = 40
+    Computer('b', ADD).run_intcode()
+    parent.run_intcode()
+    child.run_intcode()
+    assert parent.total_output == [2]
+    assert child.total_output == [41]
+
+
+def test_patch_loaded():
+    a = Computer('a', ADD)
+    a.mem[1] = 40
+    f = io.BytesIO()
+    a.save(f)
+    f.seek(0)
+    loaded = Computer.load(f, ADD)
+    Computer('b', ADD).run_intcode()
+    loaded.run_intcode()
+    assert loaded.total_output == [41]
@@ -0,0 +1,50 @@
+"""
+Outputs gathered into ``Frames``: what happens when the frames refuse one.
+"""
+import io
+from unittest import mock
+
+import pytest
+
+from intcode import Computer
+from intcode.framing import Frames
+
+from test_modes import program
+
+
+def test_refused_output_not_counted():
+    # a value that can't be spilled as 64 bits
+    c = Computer('big', f'104,{2 ** 70},99',
+                 frames=Frames(1, spill=io.BytesIO()))
+    with pytest.raises(ValueError):
+        c.run_intcode()
+    assert c.output_count == 0
+    assert c.last_output is None
+    assert c.pos == 0
+
+
+@pytest.mark.parametrize('options', [{}, {'compiled': True}, {'memoize': True},
+                                     {'record': 1000}],
+                         ids=['plain', 'compiled', 'memoized', 'recorded'])
+def test_full_ready(options):
+    # every block compiled straight away, so outputs are refused mid-block
+    with mock.patch('intcode.computer.HOT_BLOCK', 0):
+        whole = Computer('whole', program('13'), frames=3)
+        whole.run_intcode()
+        c = Computer('bounded', program('13'),
+                     frames=Frames(3, max_ready=5), **options)
+        records = []
+        refused = 0
+        while True:
+            try:
+                c.run_intcode()
+            except ValueError:
+                refused += 1
+            assert len(c.frames.ready) <= 5
+            records += c.frames.take()
+            if c.cur_opcode == 99:
+                break
+    assert refused
+    assert records == list(whole.frames.take())
+    assert (c.output_count, c.iteration) == (whole.output_count,
+                                             whole.iteration)
@@ -0,0 +1,47 @@
+"""
+``load_program``'s cache of parsed inputs, kept out of the input's directory.
+"""
+import os
+
+from intcode import Computer
+from intcode.loader import load_program
+
+from test_modes import program
+
+
+def test_cached_parse(tmp_path):
+    path = tmp_path / 'input'
+    path.write_text(program('09'))
+    cache = tmp_path / 'cache'
+    first = load_program(str(path), str(cache))
+    (cached,) = os.listdir(cache)
+    assert cached.endswith('.i64')
+    # nothing next to the input
+    assert sorted(os.listdir(tmp_path)) == ['cache', 'input']
+    again = load_program(str(path), str(cache))
+    assert [again[i] for i in range(again.size)] == \
+        [first[i] for i in range(first.size)]
+    c = Computer('boost', again, input_code=1)
+    c.run_intcode()
+    assert c.total_output == [3638931938]
+
+
+def test_edited_input(tmp_path):
+    path = tmp_path / 'input'
+    cache = tmp_path / 'cache'
+    path.write_text('104,1,99')
+    load_program(str(path), str(cache))
+    path.write_text('104,2,99')
+    image = load_program(str(path), str(cache))
+    assert [image[i] for i in range(image.size)] == [104, 2, 99]
+    # the earlier version's cache is gone
+    assert len(os.listdir(cache)) == 1
+
+
+def test_unwritable_cache(tmp_path):
+    path = tmp_path / 'input'
+    path.write_text('104,1,99')
+    blocked = tmp_path / 'file'
+    blocked.write_text('')
+    image = load_program(str(path), str(blocked / 'cache'))
+    assert [image[i] for i in range(image.size)] == [104, 1, 99]
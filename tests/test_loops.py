@@ -0,0 +1,69 @@
+"""
+Counted loops skipped in closed form by compiled blocks (``intcode.loops``)
+have to end up exactly where running them would.
+"""
+from unittest import mock
+
+import pytest
+
+from intcode import Computer
+from intcode.loops import LoopSummary
+
+
+def counting(n, step=3):
+    """
+    Counts ``i`` (cell 100) up to ``n``, adding ``step`` to ``total`` (cell
+    101) each time round, then outputs both.
+    """
+    return ','.join(map(str, [
+        1001, 100, 1, 100,      # i += 1
+        1001, 101, step, 101,   # total += step
+        1007, 100, n, 102,      # [102] = i < n
+        1005, 102, 0,           # back to the start while it is
+        4, 101, 4, 100, 99,
+    ] + [0] * 83))
+
+
+def run(inp, compiled):
+    with mock.patch('intcode.computer.HOT_BLOCK', 0):
+        c = Computer('loop', inp, compiled=compiled)
+        c.run_intcode()
+    return c.total_output, c.iteration, c.pos, c.mem[102]
+
+
+def count_skips():
+    """Patch ``LoopSummary.skip`` to keep a list of what each call skipped."""
+    skipped = []
+    skip = LoopSummary.skip
+
+    def counted(self, vm):
+        skipped.append(skip(self, vm))
+        return skipped[-1]
+    return skipped, mock.patch.object(LoopSummary, 'skip', counted)
+
+
+@pytest.mark.parametrize('n', [1, 2, 1000, 10 ** 9])
+def test_skipped_loop(n):
+    inp = counting(n)
+    skipped, patch = count_skips()
+    with patch:
+        outputs, iteration, pos, flag = run(inp, True)
+    assert outputs == [3 * n, n]
+    # the loop and two outputs (iteration counts from 1, and not the halt)
+    assert iteration == 4 * n + 2 + 1
+    assert flag == 0
+    if n > 1:
+        # all but the last time round, in one go
+        assert skipped[0] == n - 1
+    if n <= 1000:
+        assert run(inp, False) == (outputs, iteration, pos, flag)
+
+
+def test_bad_closed_form():
+    # a wrong number of iterations fails the check, so the loop runs as is
+    inp = counting(1000)
+    skipped, patch = count_skips()
+    with patch, mock.patch('intcode.loops.first_stop',
+                           lambda test, d0, dd: 5):
+        assert run(inp, True) == run(inp, False)
+    assert skipped and not any(skipped)
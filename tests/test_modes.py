@@ -0,0 +1,294 @@
+"""
+Every way the package can run a program, cross-checked against
+``LegacyComputer`` (the day 23 computer from before the package) on the
+puzzle inputs: the outputs, and where each run stopped (``iteration``,
+``pos`` and ``rel_base``) have to agree.
+"""
+import asyncio
+import functools
+import io
+import os
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from intcode import Computer, ComputerPool
+from intcode.aio import AsyncComputer
+from intcode.batch import BatchComputer
+from intcode.devices import Device, DeviceComputer
+from intcode.framing import Frames
+from intcode.legacy import LegacyComputer
+from intcode.memory import ProgramImage
+from intcode.network import Network
+from intcode.profiler import CallGraph
+from intcode.sharded import ShardedNetwork, network
+from intcode.symbolic import SymbolicComputer, concrete
+
+from conftest import ROOT
+
+
+def program(day):
+    with open(os.path.join(ROOT, day, 'input'), 'r') as f:
+        return f.readline().strip()
+
+
+def codes(text):
+    return [ord(i) for i in text]
+
+
+# name -> (day, inputs, cells patched before running); each runs until it
+# halts or needs an input it doesn't have
+WORKLOADS = {
+    'day02': ('02', [], {1: 12, 2: 2}),
+    'day05-1': ('05', [1], {}),
+    'day05-5': ('05', [5], {}),
+    'day07': ('07', [3, 0], {}),
+    'day09-1': ('09', [1], {}),
+    'day09-2': ('09', [2], {}),
+    'day11': ('11', [0], {}),
+    'day13': ('13', [], {}),
+    'day13-free': ('13', [0, 0, 1], {0: 2}),
+    'day15': ('15', [1, 2, 3, 4], {}),
+    'day17': ('17', [], {}),
+    'day19': ('19', [10, 20], {}),
+    'day21': ('21', codes('NOT A J\nWALK\n'), {}),
+    'day25': ('25', codes('north\n'), {}),
+}
+
+
+def outcome(c, status, outputs=None):
+    """What every way of running a program has to agree on."""
+    if outputs is None:
+        outputs = c.total_output
+    return (status, list(outputs), c.iteration, c.pos, c.rel_base, c.mem[0])
+
+
+@functools.lru_cache(maxsize=None)
+def expected(name):
+    day, inputs, cells = WORKLOADS[name]
+    c = LegacyComputer('legacy', program(day))
+    for addr, value in cells.items():
+        c.mem[addr] = value
+    c.input_stack = list(inputs)
+    return outcome(c, c.run_intcode())
+
+
+def patched(c, cells):
+    for addr, value in cells.items():
+        c.mem[addr] = value
+    return c
+
+
+def run(c, inputs):
+    c.input_stack += inputs
+    return outcome(c, c.run_intcode())
+
+
+def plain(inp, inputs, cells):
+    return run(patched(Computer('plain', inp), cells), inputs)
+
+
+def compiled(inp, inputs, cells):
+    return run(patched(Computer('compiled', inp, compiled=True), cells),
+               inputs)
+
+
+def compiled_eagerly(inp, inputs, cells):
+    # every block compiled the first time it's run, not once it's hot
+    with mock.patch('intcode.computer.HOT_BLOCK', 0):
+        return compiled(inp, inputs, cells)
+
+
+class Unoptimized(Computer):
+    optimize = False
+
+
+def compiled_unoptimized(inp, inputs, cells):
+    # an image of its own, which no optimized block has been cached in
+    image = ProgramImage([int(i) for i in inp.split(',')])
+    with mock.patch('intcode.computer.HOT_BLOCK', 0):
+        c = Unoptimized('unoptimized', image, compiled=True)
+        return run(patched(c, cells), inputs)
+
+
+def memoized(inp, inputs, cells):
+    return run(patched(Computer('memo', inp, memoize=True), cells), inputs)
+
+
+def profiled(inp, inputs, cells):
+    return run(patched(Computer('profiled', inp, profile=True), cells),
+               inputs)
+
+
+def call_graph(inp, inputs, cells):
+    c = Computer('calls', inp, profile=CallGraph())
+    return run(patched(c, cells), inputs)
+
+
+def traced(inp, inputs, cells):
+    c = Computer('traced', inp, trace=io.BytesIO())
+    return run(patched(c, cells), inputs)
+
+
+def recorded(inp, inputs, cells):
+    c = Computer('recorded', inp, record=1000)
+    return run(patched(c, cells), inputs)
+
+
+def forked(inp, inputs, cells):
+    parent = patched(Computer('parent', inp), cells)
+    return run(parent.fork('child'), inputs)
+
+
+def restored(inp, inputs, cells):
+    c = patched(Computer('restored', inp), cells)
+    snapshot = c.snapshot()
+    run(c, list(inputs))
+    c.restore(snapshot)
+    c.total_output = []
+    return run(c, inputs)
+
+
+def reset(inp, inputs, cells):
+    c = patched(Computer('reset', inp), cells)
+    run(c, list(inputs))
+    c.reset()
+    return run(patched(c, cells), inputs)
+
+
+def pooled(inp, inputs, cells):
+    pool = ComputerPool(inp)
+    for _ in range(2):
+        with pool.computer() as c:
+            result = run(patched(c, cells), inputs)
+    return result
+
+
+def saved(inp, inputs, cells):
+    c = patched(Computer('saved', inp), cells)
+    c.input_stack += inputs
+    c.run_until(max_steps=50)
+    f = io.BytesIO()
+    c.save(f)
+    f.seek(0)
+    loaded = Computer.load(f, inp)
+    outputs = list(loaded.total_output)
+    status = loaded.run_intcode()
+    return outcome(loaded, status, outputs + loaded.this_runs_output)
+
+
+def in_async(inp, inputs, cells):
+    async def go():
+        c = patched(AsyncComputer('async', inp), cells)
+        for value in inputs:
+            c.inbox.put_nowait(value)
+        return outcome(c, c.run_intcode())
+    return asyncio.run(go())
+
+
+class Feed(Device):
+    def __init__(self, inputs):
+        self.inputs = list(inputs)
+
+    def read(self):
+        return self.inputs.pop(0) if self.inputs else None
+
+
+def on_device(inp, inputs, cells):
+    c = patched(DeviceComputer('device', inp, Feed(inputs)), cells)
+    return outcome(c, c.run_intcode())
+
+
+def framed(inp, inputs, cells):
+    c = Computer('framed', inp, frames=Frames(1, keep=None))
+    run(patched(c, cells), inputs)
+    status = None if c.cur_opcode == 3 else False
+    return outcome(c, status, [value for value, in c.frames.kept])
+
+
+MODES = [plain, compiled, compiled_eagerly, compiled_unoptimized, memoized,
+         profiled, call_graph, traced, recorded, forked, restored, reset, pooled, saved, in_async,
+         on_device, framed]
+
+
+@pytest.mark.parametrize('mode', MODES, ids=lambda mode: mode.__name__)
+@pytest.mark.parametrize('name', sorted(WORKLOADS))
+def test_mode_matches_legacy(name, mode):
+    day, inputs, cells = WORKLOADS[name]
+    assert mode(program(day), list(inputs), cells) == expected(name)
+
+
+@pytest.mark.parametrize('name', ['day05-1', 'day05-5', 'day09-1', 'day19'])
+def test_batch_matches_legacy(name):
+    day, inputs, cells = WORKLOADS[name]
+    # the same run in every lane
+    b = BatchComputer(program(day), 3)
+    b.run(np.array([inputs] * 3))
+    status, outputs, iteration, pos, rel_base, _ = expected(name)
+    for lane in range(3):
+        assert b.outputs(lane) == outputs
+        # (lanes count the instructions run, from 0)
+        assert b.iteration[lane] + 1 == iteration
+        assert b.pc[lane] == pos
+        assert b.rel_base[lane] == rel_base
+
+
+@pytest.mark.parametrize('name', ['day02', 'day05-1', 'day05-5', 'day19'])
+def test_symbolic_matches_legacy(name):
+    day, inputs, cells = WORKLOADS[name]
+    # nothing symbolic, so there's one path
+    (path,) = SymbolicComputer(program(day), cells, inputs).run()
+    status, outputs, iteration, pos, rel_base, first = expected(name)
+    assert path.halted == (status is False)
+    assert [concrete(value) for value in path.output] == outputs
+    assert path.iteration + 1 == iteration
+    assert path.pos == pos
+    assert path.rel_base == rel_base
+    assert concrete(path.mem[0]) == first
+
+
+def legacy_nat(inp, n=50):
+    """The first packet to the NAT, from legacy NICs run round robin."""
+    nics = [LegacyComputer(f'{i}', inp, phase_setting=i) for i in range(n)]
+    queues = [[] for _ in range(n)]
+    while True:
+        for i, nic in enumerate(nics):
+            if queues[i]:
+                nic.input_stack += queues[i]
+                queues[i] = []
+                nic.run_intcode()
+            else:
+                nic.run_intcode(-1)
+            out = nic.this_runs_output
+            for j in range(0, len(out) - len(out) % 3, 3):
+                to, x, y = out[j:j + 3]
+                if to == 255:
+                    return x, y
+                queues[to] += [x, y]
+
+
+def test_networks_match_legacy():
+    inp = program('23')
+    nat = legacy_nat(inp)
+    assert Network(inp).run_until_nat() == nat
+    assert Network(inp, computer=functools.partial(
+        Computer, compiled=True)).run_until_nat() == nat
+    with ShardedNetwork(inp, workers=2) as network:
+        assert network.run_until_nat() == nat
+
+    repeat = Network(inp).run_until_repeat()
+    with ShardedNetwork(inp, workers=2) as network:
+        assert network.run_until_repeat() == repeat
+
+
+def test_network_choice():
+    inp = program('23')
+    # one core: a worker process can't keep up with this one
+    with mock.patch('multiprocessing.cpu_count', lambda: 1):
+        with network(inp, workers=4) as net:
+            assert type(net) is Network
+    with mock.patch('multiprocessing.cpu_count', lambda: 4):
+        with network(inp) as net:
+            assert isinstance(net, ShardedNetwork)
+            assert net.run_until_nat() == Network(inp).run_until_nat()
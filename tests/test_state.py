@@ -0,0 +1,85 @@
+"""
+Saved states, including those saved by version 1 of the format.
+"""
+import io
+
+import pytest
+
+from intcode import Computer
+from intcode import state
+from intcode.framing import Frames
+
+from test_modes import program
+
+
+def dump_v1(vm, f):
+    """Save ``vm`` as version 1 did: no frames, and the last run's count."""
+    body = io.BytesIO()
+    image = vm.mem.image
+    body.write(state.STATE.pack(
+        image.digest, image.size, vm.pos, vm.rel_base, vm.iteration,
+        -1 if vm.output_pos is None else vm.output_pos,
+        -1 if vm.cur_opcode is None else vm.cur_opcode,
+        len(vm.this_runs_output), len(vm.mem.pages)))
+    state._write_values(body, vm.input_stack)
+    state._write_values(body, vm.total_output)
+    pages = list(state._changed_pages(vm.mem))
+    body.write(state.PAGE_INDEX.pack(len(pages)))
+    for i, page in pages:
+        body.write(state.PAGE_INDEX.pack(i))
+        state._write_values(body, page)
+    f.write(state.HEADER.pack(state.MAGIC, 1, 0))
+    f.write(body.getvalue())
+
+
+def droid():
+    """Day 25's droid, two commands in."""
+    c = Computer('droid', program('25'))
+    for command in ['north\n', 'south\n']:
+        c.run_intcode()
+        c.input_stack += [ord(i) for i in command]
+    c.run_intcode()
+    return c
+
+
+def test_round_trip():
+    c = droid()
+    f = io.BytesIO()
+    c.save(f)
+    f.seek(0)
+    loaded = Computer.load(f, program('25'))
+    for attr in ('pos', 'rel_base', 'iteration', 'total_output',
+                 'this_runs_output', 'last_output', 'output_count'):
+        assert getattr(loaded, attr) == getattr(c, attr)
+
+
+def test_version_1():
+    c = droid()
+    f = io.BytesIO()
+    dump_v1(c, f)
+    f.seek(0)
+    loaded = Computer.load(f, program('25'))
+    for attr in ('pos', 'rel_base', 'iteration', 'total_output',
+                 'this_runs_output', 'last_output', 'output_count'):
+        assert getattr(loaded, attr) == getattr(c, attr)
+    # and it carries on the same
+    for computer in (c, loaded):
+        computer.input_stack += [ord(i) for i in 'inv\n']
+        computer.run_intcode()
+    assert loaded.total_output == c.total_output
+    assert loaded.mem[:c.mem.image.size] == c.mem[:c.mem.image.size]
+
+
+def test_version_1_into_frames():
+    f = io.BytesIO()
+    dump_v1(droid(), f)
+    f.seek(0)
+    c = Computer('framed', program('25'), frames=Frames(1))
+    with pytest.raises(ValueError):
+        state.load(f, c)
+
+
+def test_unknown_version():
+    f = io.BytesIO(state.HEADER.pack(state.MAGIC, state.VERSION + 1, 0))
+    with pytest.raises(ValueError):
+        Computer.load(f, program('25'))